@@ -0,0 +1,177 @@
+import os
+import struct
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_POSTAL_CSV = 'Visualization w ceased/SG_postal.csv'
+DEFAULT_INDEX_PATH = 'Visualization w ceased/SG_postal.index.bin'
+
+# File layout: 16-byte header (magic, entry count), then the sorted uint32
+# keys, then float32 latitudes, then float32 longitudes, all little-endian
+_MAGIC = b'SGPOST1\0'
+_HEADER = struct.Struct('<8sQ')
+_MAX_KEY = 2 ** 32 - 1
+
+# geocode() match qualities, best first: 'exact' is a canonical six-digit
+# code found as given, 'normalized' was found after zero padding or cleanup
+# (e.g. '81007', ' 081007', '81007.0'), 'not_found' is a well-formed code the
+# index does not have, 'missing' is blank or 'na', 'invalid' is anything else
+MATCH_QUALITIES = ('exact', 'normalized', 'not_found', 'missing', 'invalid')
+
+def postal_key(postal_code) -> Optional[int]:
+    """Integer key of a postal code, so '081007', '81007' and 81007 all match;
+    None for blanks, 'na' and other non-numeric values"""
+    text = str(postal_code).strip()
+    if text.endswith('.0'):
+        text = text[:-2]  # read as float by pandas
+    if not text.isdigit() or int(text) > _MAX_KEY:
+        return None
+    return int(text)
+
+def normalize_postal_codes(postal_codes: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized postal_key over many codes: int64 keys (-1 where a code has
+    none) and the match quality each code gets if its key is found"""
+    raw = pd.Series(postal_codes, dtype='string')
+    text = raw.str.strip().str.replace(r'\.0$', '', regex=True)  # read as float by pandas
+    missing = (text.isna() | (text == '') | (text.str.lower() == 'na')).to_numpy(bool)
+    keys = pd.to_numeric(text.where(text.str.fullmatch(r'\d{1,10}').fillna(False)), errors='coerce')
+    keys = keys.where(keys <= _MAX_KEY).fillna(-1).to_numpy(np.int64)
+
+    exact = ((raw == text) & (text.str.len() == 6)).fillna(False).to_numpy(bool)
+    quality = np.where(keys < 0, np.where(missing, 'missing', 'invalid'),
+                       np.where(exact, 'exact', 'normalized')).astype(object)
+    return keys, quality
+
+def compile_postal_index(csv_path: str = DEFAULT_POSTAL_CSV, index_path: str = DEFAULT_INDEX_PATH) -> int:
+    """Compile the postal CSV (postal_code, lat, lon columns) into the binary
+    index; returns the number of postal codes. Where a code appears more than
+    once the last row wins, as it did in the old dict."""
+    postal_df = pd.read_csv(csv_path, usecols=['postal_code', 'lat', 'lon'], dtype={'postal_code': str})
+    keys = postal_df['postal_code'].map(postal_key)
+    lat = pd.to_numeric(postal_df['lat'], errors='coerce')
+    lon = pd.to_numeric(postal_df['lon'], errors='coerce')
+    valid = keys.notna() & lat.notna() & lon.notna()
+    keys = keys[valid].to_numpy(np.int64)
+    lat = lat[valid].to_numpy(np.float64)
+    lon = lon[valid].to_numpy(np.float64)
+
+    order = np.argsort(keys, kind='stable')
+    keys, lat, lon = keys[order], lat[order], lon[order]
+    last = np.ones(len(keys), dtype=bool)
+    last[:-1] = keys[1:] != keys[:-1]
+    keys, lat, lon = keys[last], lat[last], lon[last]
+
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, len(keys)))
+        f.write(keys.astype('<u4').tobytes())
+        f.write(lat.astype('<f4').tobytes())
+        f.write(lon.astype('<f4').tobytes())
+    os.replace(tmp_path, index_path)
+    return len(keys)
+
+class PostalIndex:
+    """Read-only postal code -> (lat, lng) lookups on a memory-mapped index file.
+
+    Opening maps the file without reading it; each lookup is a binary
+    search over the sorted keys, so only the pages it touches are loaded.
+    """
+
+    def __init__(self, index_path: str = DEFAULT_INDEX_PATH):
+        with open(index_path, 'rb') as f:
+            magic, count = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC:
+            raise ValueError(f"{index_path} is not a postal index file")
+        self.path = index_path
+        offset = _HEADER.size
+        self.keys = np.memmap(index_path, dtype='<u4', mode='r', offset=offset, shape=(count,))
+        offset += 4 * count
+        self.lat = np.memmap(index_path, dtype='<f4', mode='r', offset=offset, shape=(count,))
+        offset += 4 * count
+        self.lon = np.memmap(index_path, dtype='<f4', mode='r', offset=offset, shape=(count,))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def position(self, postal_code) -> Optional[int]:
+        """Row of a postal code in the index, or None if it is not there"""
+        key = postal_key(postal_code)
+        if key is None or len(self.keys) == 0:
+            return None
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return None
+
+    def lookup(self, postal_code) -> Optional[Tuple[float, float]]:
+        """(lat, lng) for a postal code, or None if it is not in the index"""
+        i = self.position(postal_code)
+        if i is None:
+            return None
+        # float32 is good to ~1 cm in latitude but only ~1 m in longitude near 103.8E;
+        # round off the float32 noise
+        return round(float(self.lat[i]), 6), round(float(self.lon[i]), 6)
+
+    def geocode(self, postal_codes: Sequence) -> pd.DataFrame:
+        """Geocode many postal codes in one pass.
+
+        The codes are normalized to integer keys together and looked up with
+        a single searchsorted over the index. Returns one row per code (with
+        the input's index if it is a Series) holding postal_code, lat and lng
+        (NaN where unmatched) and match_quality (see MATCH_QUALITIES).
+        """
+        keys, quality = normalize_postal_codes(postal_codes)
+        lat = np.full(len(keys), np.nan)
+        lng = np.full(len(keys), np.nan)
+
+        rows = np.flatnonzero(keys >= 0)
+        if len(self.keys) and len(rows):
+            wanted = keys[rows]
+            pos = np.minimum(np.searchsorted(self.keys, wanted), len(self.keys) - 1)
+            found = self.keys[pos] == wanted
+            lat[rows[found]] = np.round(self.lat[pos[found]].astype(np.float64), 6)
+            lng[rows[found]] = np.round(self.lon[pos[found]].astype(np.float64), 6)
+            quality[rows[~found]] = 'not_found'
+        else:
+            quality[rows] = 'not_found'
+
+        index = postal_codes.index if isinstance(postal_codes, pd.Series) else None
+        return pd.DataFrame({'postal_code': list(postal_codes), 'lat': lat, 'lng': lng,
+                             'match_quality': quality}, index=index)
+
+    def __contains__(self, postal_code) -> bool:
+        return self.position(postal_code) is not None
+
+def geocode_report(geocoded: pd.DataFrame) -> pd.DataFrame:
+    """Count and share of each match quality in a geocode() result"""
+    counts = geocoded['match_quality'].value_counts().reindex(list(MATCH_QUALITIES), fill_value=0)
+    total = max(len(geocoded), 1)
+    return pd.DataFrame({'count': counts, 'percent': (counts / total * 100).round(1)})
+
+def index_path_for(csv_path: str) -> str:
+    """Index file kept next to a postal CSV: SG_postal.csv -> SG_postal.index.bin"""
+    return os.path.splitext(csv_path)[0] + '.index.bin'
+
+def load_postal_index(csv_path: str = DEFAULT_POSTAL_CSV, index_path: Optional[str] = None) -> PostalIndex:
+    """Open the index (next to the CSV unless index_path is given), compiling
+    it first if it is missing or older than the CSV"""
+    if index_path is None:
+        index_path = index_path_for(csv_path)
+    if not os.path.exists(index_path) or (
+            os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(index_path)):
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(csv_path)
+        print(f"Compiling postal index {index_path} from {csv_path}...")
+        count = compile_postal_index(csv_path, index_path)
+        print(f"Wrote {count} postal codes")
+    return PostalIndex(index_path)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Compile SG_postal.csv into a memory-mapped binary postal index')
+    parser.add_argument('--csv', default=DEFAULT_POSTAL_CSV, help='Postal CSV with postal_code, lat, lon columns')
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH, help='Index file to write')
+    args = parser.parse_args()
+    print(f"Wrote {compile_postal_index(args.csv, args.index)} postal codes to {args.index}")
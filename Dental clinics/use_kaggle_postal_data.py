@@ -1,32 +1,36 @@
+import os
+import sys
+import argparse
 import pandas as pd
 import folium
 import json
 import csv
 from folium import plugins
 
+# Shared map helpers live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from map_layers import RENDER_MODES, add_point_layer, check_render_mode, parse_layer_render_modes, point_style
+from map_tiles import add_tiled_point_layer, tile_url
+from postal_index import load_postal_index
+from spatial_join import PolygonIndex, area_density
+from boundary_prep import add_boundary_layer, load_boundary_levels, prepare_boundary_levels
+from instrumentation import configure_instrumentation, get_instrumentation
+
+# Shared popup template for the data render mode, filled in the browser
+CLINIC_POPUP_TEMPLATE = """
+<b>{entity_name}</b><br>
+<b>Status:</b> {entity_active}<br>
+<b>Address:</b> {address}<br>
+<b>Registration Date:</b> {registration_incorporation_date}<br>
+<b>UEN:</b> {uen}<br>
+<b>Postal Code:</b> {postal_code}
+"""
+CLINIC_POPUP_FIELDS = ['entity_name', 'entity_active', 'address', 'registration_incorporation_date', 'uen', 'postal_code']
+
 def load_postal_coordinates(postal_data_file):
-    """Load postal code coordinates from Kaggle dataset"""
+    """Open the memory-mapped postal code index, compiling it from the Kaggle CSV on first use"""
     try:
-        # Read the Kaggle postal code dataset
-        # Expected columns: postal_code, latitude, longitude (or similar)
-        postal_df = pd.read_csv(postal_data_file)
-        
-        # Print column names to understand the structure
-        print("Postal data columns:", postal_df.columns.tolist())
-        print("First few rows:")
-        print(postal_df.head())
-        
-        # Create a mapping from postal code to coordinates
-        # Adjust column names based on the actual dataset structure
-        postal_coords = {}
-        
-        # Use the exact column names from SG_postal.csv
-        for _, row in postal_df.iterrows():
-            postal_code = str(row['postal_code']).strip()
-            lat = float(row['lat'])
-            lng = float(row['lon'])
-            postal_coords[postal_code] = [lat, lng]
-        
+        postal_coords = load_postal_index(csv_path=postal_data_file)
         print(f"Successfully loaded {len(postal_coords)} postal code coordinates")
         return postal_coords
             
@@ -39,28 +43,15 @@ def load_postal_coordinates(postal_data_file):
         return {}
 
 def get_coordinates_from_postal_code(postal_code, postal_coords):
-    """Get exact coordinates from postal code using Kaggle data"""
-    if not postal_code or postal_code == 'na':
+    """Get exact coordinates for a single postal code; (None, None) if it has none.
+
+    Codes are matched as integers, so '081007', '81007' and '081007 '
+    all find the same entry. Use postal_coords.geocode() for many codes.
+    """
+    coords = postal_coords.lookup(postal_code)
+    if coords is None:
         return None, None
-    
-    postal_code = str(postal_code).strip()
-    
-    # Try exact match first
-    if postal_code in postal_coords:
-        return postal_coords[postal_code]
-    
-    # Try with leading zeros removed
-    postal_code_no_zeros = postal_code.lstrip('0')
-    if postal_code_no_zeros in postal_coords:
-        return postal_coords[postal_code_no_zeros]
-    
-    # Try with leading zeros added (6 digits)
-    postal_code_padded = postal_code.zfill(6)
-    if postal_code_padded in postal_coords:
-        return postal_coords[postal_code_padded]
-    
-    # If no exact match, return None
-    return None, None
+    return coords
 
 def load_household_income_data():
     """Load household income data from CSV"""
@@ -83,115 +74,132 @@ def load_planning_area_boundaries():
 def load_dental_clinics(postal_coords):
     """Load dental clinics data from the new CSV file"""
     clinics = []
-    geocoded_count = 0
     
     try:
         with open('Visualization w ceased/Dental_Clinics_Acra.csv', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Extract address components from columns P to S
-                street_name = row.get('street_name', '')
-                building_name = row.get('building_name', '')
-                unit_no = row.get('unit_no', '')
-                postal_code = row.get('postal_code', '')
-                
-                # Construct full address
-                address_parts = []
-                if street_name:
-                    address_parts.append(street_name)
-                if building_name and building_name != 'na':
-                    address_parts.append(building_name)
-                if unit_no and unit_no != 'na':
-                    address_parts.append(f"#{unit_no}")
-                if postal_code and postal_code != 'na':
-                    address_parts.append(postal_code)
-                
-                full_address = ', '.join(address_parts) if address_parts else 'Address not available'
-                
-                # Get exact coordinates from postal code using Kaggle data
-                lat, lng = get_coordinates_from_postal_code(postal_code, postal_coords)
-                if lat and lng:
-                    geocoded_count += 1
-                
-                clinic = {
-                    'uen': row.get('uen', ''),
-                    'entity_name': row.get('entity_name', ''),
-                    'entity_active': row.get('entity_active', ''),
-                    'address': full_address,
-                    'street_name': street_name,
-                    'building_name': building_name,
-                    'unit_no': unit_no,
-                    'postal_code': postal_code,
-                    'entity_status_description': row.get('entity_status_description', ''),
-                    'registration_incorporation_date': row.get('registration_incorporation_date', ''),
-                    'lat': lat,
-                    'lng': lng
-                }
-                clinics.append(clinic)
+            rows = list(csv.DictReader(f))
+        
+        # Geocode every clinic against the postal index in one batch
+        geocoded = postal_coords.geocode([row.get('postal_code', '') for row in rows])
+        instrumentation = get_instrumentation()
+        for quality, count in geocoded['match_quality'].value_counts().items():
+            instrumentation.count('clinic_geocodes', int(count), match_quality=quality)
+        lats = geocoded['lat'].astype(object).where(geocoded['lat'].notna(), None).tolist()
+        lngs = geocoded['lng'].astype(object).where(geocoded['lng'].notna(), None).tolist()
+        
+        for row, lat, lng in zip(rows, lats, lngs):
+            # Extract address components from columns P to S
+            street_name = row.get('street_name', '')
+            building_name = row.get('building_name', '')
+            unit_no = row.get('unit_no', '')
+            postal_code = row.get('postal_code', '')
+            
+            # Construct full address
+            address_parts = []
+            if street_name:
+                address_parts.append(street_name)
+            if building_name and building_name != 'na':
+                address_parts.append(building_name)
+            if unit_no and unit_no != 'na':
+                address_parts.append(f"#{unit_no}")
+            if postal_code and postal_code != 'na':
+                address_parts.append(postal_code)
+            
+            full_address = ', '.join(address_parts) if address_parts else 'Address not available'
+            
+            clinic = {
+                'uen': row.get('uen', ''),
+                'entity_name': row.get('entity_name', ''),
+                'entity_active': row.get('entity_active', ''),
+                'address': full_address,
+                'street_name': street_name,
+                'building_name': building_name,
+                'unit_no': unit_no,
+                'postal_code': postal_code,
+                'entity_status_description': row.get('entity_status_description', ''),
+                'registration_incorporation_date': row.get('registration_incorporation_date', ''),
+                'lat': lat,
+                'lng': lng
+            }
+            clinics.append(clinic)
         
         print(f"Loaded {len(clinics)} dental clinics from CSV")
-        print(f"Successfully geocoded {geocoded_count} clinics with exact coordinates")
+        print(f"Successfully geocoded {int(geocoded['lat'].notna().sum())} clinics with exact coordinates")
         return clinics
     except FileNotFoundError:
         print("Error: Dental_Clinics_Acra.csv not found in 'Visualization w ceased' folder")
         return []
 
-def get_color_by_income(income):
-    """Get color based on household income - using blue color scheme for better contrast"""
-    if income < 5000:
-        return '#e3f2fd'  # Very light blue
-    elif income < 8000:
-        return '#90caf9'  # Light blue
-    elif income < 12000:
-        return '#42a5f5'  # Medium blue
-    elif income < 15000:
-        return '#1976d2'  # Dark blue
-    else:
-        return '#0d47a1'  # Very dark blue
+def assign_clinic_planning_areas(clinics, boundaries, income_data):
+    """Tag geocoded clinics with the planning area they lie in and print
+    clinics per 1,000 households for each area"""
+    geocoded = [clinic for clinic in clinics if clinic.get('lat') and clinic.get('lng')]
+    if not geocoded:
+        return
+    
+    index = PolygonIndex(boundaries)
+    areas, counts = index.join([clinic['lat'] for clinic in geocoded], [clinic['lng'] for clinic in geocoded])
+    for clinic, area in zip(geocoded, areas):
+        clinic['planning_area'] = area
+    print(f"Assigned {int(counts.sum())} of {len(geocoded)} geocoded clinics to planning areas")
+    
+    if income_data is not None:
+        density = area_density(counts, income_data).dropna(subset=['total_households'])
+        density = density.sort_values('per_1000_households', ascending=False)
+        instrumentation = get_instrumentation()
+        instrumentation.detail("\nClinics per 1,000 households by planning area:")
+        instrumentation.detail(density.to_string(float_format=lambda value: f"{value:,.2f}"))
 
-def create_interactive_map(income_data, boundaries, clinics):
-    """Create interactive map with household income and dental clinics"""
+def add_clinic_layer(feature_group, clinics, color, icon, render_mode, tile_dir=None, output_file=None,
+                     layer_name=None):
+    """Add a group of clinics as one data-driven point layer ('data' or 'canvas').
+    With tile_dir the clinics go to tile files under tile_dir/layer_name,
+    fetched by the page saved as output_file."""
+    if clinics:
+        style = point_style(color)
+        style['icon'].update(icon=icon, prefix='fa')
+        layer_options = dict(popup=CLINIC_POPUP_TEMPLATE, tooltip='{entity_name}', popup_max_width=300,
+                             styles={'default': style}, render=render_mode)
+        if tile_dir is not None:
+            add_tiled_point_layer(feature_group, pd.DataFrame(clinics), CLINIC_POPUP_FIELDS, ['entity_active'],
+                                  directory=os.path.join(tile_dir, layer_name),
+                                  url=tile_url(tile_dir, output_file, layer_name), **layer_options)
+        else:
+            add_point_layer(feature_group, pd.DataFrame(clinics), CLINIC_POPUP_FIELDS, category_fields=['entity_active'],
+                            **layer_options)
+
+def create_interactive_map(income_data, boundaries, clinics, render_mode='markers', layer_render_modes=None,
+                           tile_dir=None, output_file='dental_clinics_exact_coordinates.html', boundary_levels=None):
+    """Create interactive map with household income and dental clinics.
+
+    render_mode 'data' draws the clinics from one payload per group with a
+    shared popup template instead of a marker and popup block per clinic;
+    'canvas' draws that payload as circles on a canvas. layer_render_modes
+    overrides the mode per group: 'active', 'non_active' or 'ashford'.
+    With tile_dir, those layers are written as tile files there and
+    fetched per viewport by the page (to be saved as output_file).
+    boundary_levels are prepared boundaries from boundary_prep; they are
+    prepared from boundaries and income_data when not given.
+    """
+    check_render_mode(render_mode)
+    layer_render_modes = layer_render_modes or {}
+    for mode in layer_render_modes.values():
+        check_render_mode(mode)
     
     # Create base map centered on Singapore
     m = folium.Map(location=[1.3521, 103.8198], zoom_start=11)
     
-    # Add household income choropleth layer
+    # Add household income choropleth layer: simplified boundaries with the
+    # income join and fill colours baked in, more detail as the map zooms in
     if income_data is not None and boundaries is not None:
-        # Create a mapping from planning area names to income data
-        # Handle case mismatch between income data and GeoJSON
-        income_dict = {}
-        for area, income in zip(income_data['planning_area'], income_data['avg_household_income']):
-            # Store both title case and uppercase versions
-            income_dict[area] = income
-            income_dict[area.upper()] = income
-        
-        print(f"Available planning areas in income data: {list(income_data['planning_area'])}")
-        print(f"Sample income mapping: {dict(list(income_dict.items())[:5])}")
-        
-        # Style function for the choropleth
-        def style_function(feature):
-            area_name = feature['properties']['PLN_AREA_N']
-            income = income_dict.get(area_name, 0)
-            if income == 0:
-                print(f"No income data found for area: {area_name}")
-            return {
-                'fillColor': get_color_by_income(income),
-                'color': 'black',
-                'weight': 1,
-                'fillOpacity': 0.7
-            }
-        
-        # Add choropleth layer
-        folium.GeoJson(
-            boundaries,
-            name='Household Income',
-            style_function=style_function,
-            tooltip=folium.GeoJsonTooltip(
-                fields=['PLN_AREA_N'],
-                aliases=['Planning Area:'],
-                style=("background-color: white; color: #333333; font-family: arial; font-size: 12px; padding: 10px;")
-            )
-        ).add_to(m)
+        if boundary_levels is None:
+            boundary_levels = prepare_boundary_levels(boundaries, income_data)
+        add_boundary_layer(
+            m, boundary_levels, 'Household Income',
+            style={'color': 'black', 'weight': 1, 'fillOpacity': 0.7},
+            fill_property='fill_color',
+            tooltip=('PLN_AREA_N', 'Planning Area:')
+        )
     
     # Add dental clinics markers
     if clinics:
@@ -222,68 +230,80 @@ def create_interactive_map(income_data, boundaries, clinics):
         
         # Add active clinics (green)
         fg_active = folium.FeatureGroup(name="Active Clinics", show=True)
-        for clinic in active_clinics:
-            popup_text = f"""
-            <b>{clinic['entity_name']}</b><br>
-            <b>Status:</b> {clinic['entity_active']}<br>
-            <b>Address:</b> {clinic['address']}<br>
-            <b>Registration Date:</b> {clinic['registration_incorporation_date']}<br>
-            <b>UEN:</b> {clinic['uen']}<br>
-            <b>Postal Code:</b> {clinic['postal_code']}
-            """
+        active_mode = layer_render_modes.get('active', render_mode)
+        if active_mode != 'markers':
+            add_clinic_layer(fg_active, active_clinics, 'green', 'check-circle', active_mode, tile_dir, output_file, 'active')
+        else:
+            for clinic in active_clinics:
+                popup_text = f"""
+                <b>{clinic['entity_name']}</b><br>
+                <b>Status:</b> {clinic['entity_active']}<br>
+                <b>Address:</b> {clinic['address']}<br>
+                <b>Registration Date:</b> {clinic['registration_incorporation_date']}<br>
+                <b>UEN:</b> {clinic['uen']}<br>
+                <b>Postal Code:</b> {clinic['postal_code']}
+                """
             
-            location = [clinic['lat'], clinic['lng']]
+                location = [clinic['lat'], clinic['lng']]
             
-            folium.Marker(
-                location=location,
-                popup=folium.Popup(popup_text, max_width=300),
-                tooltip=clinic['entity_name'],
-                icon=folium.Icon(color='green', icon='check-circle', prefix='fa')
-            ).add_to(fg_active)
+                folium.Marker(
+                    location=location,
+                    popup=folium.Popup(popup_text, max_width=300),
+                    tooltip=clinic['entity_name'],
+                    icon=folium.Icon(color='green', icon='check-circle', prefix='fa')
+                ).add_to(fg_active)
         fg_active.add_to(m)
         
         # Add non-active clinics (red)
         fg_non_active = folium.FeatureGroup(name="Non-Active Clinics", show=False)
-        for clinic in non_active_clinics:
-            popup_text = f"""
-            <b>{clinic['entity_name']}</b><br>
-            <b>Status:</b> {clinic['entity_active']}<br>
-            <b>Address:</b> {clinic['address']}<br>
-            <b>Registration Date:</b> {clinic['registration_incorporation_date']}<br>
-            <b>UEN:</b> {clinic['uen']}<br>
-            <b>Postal Code:</b> {clinic['postal_code']}
-            """
+        non_active_mode = layer_render_modes.get('non_active', render_mode)
+        if non_active_mode != 'markers':
+            add_clinic_layer(fg_non_active, non_active_clinics, 'red', 'times-circle', non_active_mode, tile_dir, output_file, 'non_active')
+        else:
+            for clinic in non_active_clinics:
+                popup_text = f"""
+                <b>{clinic['entity_name']}</b><br>
+                <b>Status:</b> {clinic['entity_active']}<br>
+                <b>Address:</b> {clinic['address']}<br>
+                <b>Registration Date:</b> {clinic['registration_incorporation_date']}<br>
+                <b>UEN:</b> {clinic['uen']}<br>
+                <b>Postal Code:</b> {clinic['postal_code']}
+                """
             
-            location = [clinic['lat'], clinic['lng']]
+                location = [clinic['lat'], clinic['lng']]
             
-            folium.Marker(
-                location=location,
-                popup=folium.Popup(popup_text, max_width=300),
-                tooltip=clinic['entity_name'],
-                icon=folium.Icon(color='red', icon='times-circle', prefix='fa')
-            ).add_to(fg_non_active)
+                folium.Marker(
+                    location=location,
+                    popup=folium.Popup(popup_text, max_width=300),
+                    tooltip=clinic['entity_name'],
+                    icon=folium.Icon(color='red', icon='times-circle', prefix='fa')
+                ).add_to(fg_non_active)
         fg_non_active.add_to(m)
         
         # Add Ashford clinics (purple)
         fg_ashford = folium.FeatureGroup(name="Ashford Clinics", show=True)
-        for clinic in ashford_clinics:
-            popup_text = f"""
-            <b>{clinic['entity_name']}</b><br>
-            <b>Status:</b> {clinic['entity_active']}<br>
-            <b>Address:</b> {clinic['address']}<br>
-            <b>Registration Date:</b> {clinic['registration_incorporation_date']}<br>
-            <b>UEN:</b> {clinic['uen']}<br>
-            <b>Postal Code:</b> {clinic['postal_code']}
-            """
+        ashford_mode = layer_render_modes.get('ashford', render_mode)
+        if ashford_mode != 'markers':
+            add_clinic_layer(fg_ashford, ashford_clinics, 'purple', 'star', ashford_mode, tile_dir, output_file, 'ashford')
+        else:
+            for clinic in ashford_clinics:
+                popup_text = f"""
+                <b>{clinic['entity_name']}</b><br>
+                <b>Status:</b> {clinic['entity_active']}<br>
+                <b>Address:</b> {clinic['address']}<br>
+                <b>Registration Date:</b> {clinic['registration_incorporation_date']}<br>
+                <b>UEN:</b> {clinic['uen']}<br>
+                <b>Postal Code:</b> {clinic['postal_code']}
+                """
             
-            location = [clinic['lat'], clinic['lng']]
+                location = [clinic['lat'], clinic['lng']]
             
-            folium.Marker(
-                location=location,
-                popup=folium.Popup(popup_text, max_width=300),
-                tooltip=clinic['entity_name'],
-                icon=folium.Icon(color='purple', icon='star', prefix='fa')
-            ).add_to(fg_ashford)
+                folium.Marker(
+                    location=location,
+                    popup=folium.Popup(popup_text, max_width=300),
+                    tooltip=clinic['entity_name'],
+                    icon=folium.Icon(color='purple', icon='star', prefix='fa')
+                ).add_to(fg_ashford)
         fg_ashford.add_to(m)
         
         print(f"Added {len(active_clinics)} active clinics")
@@ -317,13 +337,39 @@ def create_interactive_map(income_data, boundaries, clinics):
     
     return m
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Map dental clinics over household income')
+    parser.add_argument('--render', choices=RENDER_MODES, default='markers',
+                        help="'data' renders the clinics from one compact payload (much smaller HTML); "
+                             "'canvas' draws that payload as circles on a canvas")
+    parser.add_argument('--layer-render', action='append', metavar='GROUP=MODE',
+                        help='Render mode for one clinic group (active, non_active, ashford), e.g. non_active=canvas')
+    parser.add_argument('--tiles', action='store_true',
+                        help='Write data/canvas clinic layers to dental_clinics_exact_coordinates_tiles/ '
+                             'and load them per viewport')
+    parser.add_argument('--quiet', action='store_true', help='Skip the per-area clinic density table')
+    parser.add_argument('--metrics', default=None, metavar='PATH',
+                        help='Write stage timings, clinic counts and output sizes to PATH '
+                             '(Prometheus text for .prom/.txt, JSON otherwise)')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Record each stage's peak Python memory with tracemalloc")
+    args = parser.parse_args(argv)
+    if args.tiles and args.render == 'markers' and not args.layer_render:
+        parser.error('--tiles needs --render data or --render canvas')
+    try:
+        layer_render_modes = parse_layer_render_modes(args.layer_render)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    instrumentation = configure_instrumentation(pipeline='dental_clinics', quiet=args.quiet,
+                                                trace_memory=args.trace_memory)
     print("Creating dental clinics visualization with exact SG postal coordinates...")
     
     # Load the Singapore postal code dataset
     postal_data_file = 'Visualization w ceased/SG_postal.csv'
     
-    postal_coords = load_postal_coordinates(postal_data_file)
+    with instrumentation.stage('load_postal_index'):
+        postal_coords = load_postal_coordinates(postal_data_file)
     
     if not postal_coords:
         print("\nERROR: Could not load postal code coordinates.")
@@ -331,22 +377,39 @@ def main():
         return
     
     # Load other data
-    income_data = load_household_income_data()
-    boundaries = load_planning_area_boundaries()
-    clinics = load_dental_clinics(postal_coords)
+    with instrumentation.stage('load_income_and_boundaries'):
+        income_data = load_household_income_data()
+        boundaries = load_planning_area_boundaries()
+        boundary_levels = load_boundary_levels() if boundaries is not None else None
+    with instrumentation.stage('load_and_geocode_clinics'):
+        clinics = load_dental_clinics(postal_coords)
     
     if not clinics:
         print("No dental clinics data found. Exiting.")
         return
     
+    # Planning area of each clinic, and clinic density against households
+    if boundaries is not None:
+        with instrumentation.stage('assign_planning_areas'):
+            assign_clinic_planning_areas(clinics, boundaries, income_data)
+    
     # Create interactive map
     print("Creating interactive map...")
-    m = create_interactive_map(income_data, boundaries, clinics)
+    output_file = 'dental_clinics_exact_coordinates.html'
+    tile_dir = 'dental_clinics_exact_coordinates_tiles' if args.tiles else None
+    with instrumentation.stage('map'):
+        m = create_interactive_map(income_data, boundaries, clinics, render_mode=args.render,
+                                   layer_render_modes=layer_render_modes, tile_dir=tile_dir, output_file=output_file,
+                                   boundary_levels=boundary_levels)
     
     # Save map
-    output_file = 'dental_clinics_exact_coordinates.html'
-    m.save(output_file)
+    with instrumentation.stage('save'):
+        m.save(output_file)
     print(f"Map saved as {output_file}")
+    instrumentation.record_file(output_file)
+    if tile_dir is not None:
+        instrumentation.record_file(tile_dir)
+    instrumentation.count_by('clinics', clinics, 'entity_active', 'planning_area')
     
     # Print summary statistics
     if clinics:
@@ -361,6 +424,12 @@ def main():
         print(f"Active clinics (geocoded): {active_count}")
         print(f"Non-active clinics (geocoded): {non_active_count}")
         print(f"Ashford clinics (geocoded): {ashford_count}")
+    
+    print("\n=== STAGE TIMINGS ===")
+    instrumentation.print_stages()
+    if args.metrics:
+        instrumentation.write(args.metrics)
+    instrumentation.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,132 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+
+from padel_court_finder_clean_highres import (
+    SEARCH_CATEGORIES,
+    SearchRequestError,
+    fetch_search_page,
+    get_total_pages,
+    parse_search_results,
+    enrich_area_locations,
+)
+from instrumentation import get_instrumentation
+
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+
+class RateLimiter:
+    """Space out request starts so the crawl never exceeds a global request rate"""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            wait = self._next_start - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+                now = loop.time()
+            self._next_start = max(now, self._next_start) + self.interval
+
+class AsyncCrawler:
+    """Run the area x category OneMap searches concurrently.
+
+    The blocking search helpers run on a dedicated thread pool, so every
+    request still goes through robust_request. The semaphore caps the number
+    of requests in flight and the rate limiter caps how fast new ones start.
+    """
+
+    def __init__(self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 max_pages: Optional[int] = None, on_area_complete=None):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_pages = max_pages
+        self.on_area_complete = on_area_complete
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self._semaphore = None
+        self._executor = None
+
+    async def fetch_page(self, search_val: str, page_num: int = 1) -> Optional[Dict]:
+        """Fetch one OneMap search page under the in-flight cap and rate limit"""
+        async with self._semaphore:
+            await self.rate_limiter.acquire()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fetch_search_page, search_val, page_num)
+
+    async def fetch_all_pages(self, search_val: str) -> List[Dict]:
+        """Fetch the first page, then every remaining page concurrently, in page order"""
+        first_page = await self.fetch_page(search_val, 1)
+        if first_page is None:
+            raise SearchRequestError(f"page 1 of '{search_val}'")
+        total_pages = get_total_pages(first_page, self.max_pages)
+        pages = [first_page] + await asyncio.gather(*[
+            self.fetch_page(search_val, page_num) for page_num in range(2, total_pages + 1)
+        ])
+        results = []
+        for page_num, data in enumerate(pages, start=1):
+            if data is None:
+                raise SearchRequestError(f"page {page_num} of '{search_val}'")
+            results.extend(data.get('results', []))
+        return results
+
+    async def fetch_category(self, planning_area: str, category: Dict) -> Optional[List[Dict]]:
+        """Search one category in a planning area, returning None if the search failed"""
+        try:
+            results = await self.fetch_all_pages(f"{category['query']} {planning_area}")
+            return parse_search_results(results, category, planning_area)
+        except SearchRequestError as e:
+            print(f"Search failed for {category['data_label']} in {planning_area}: {e}")
+            return None
+        except Exception as e:
+            print(f"Error processing {category['data_label']} data for {planning_area}: {e}")
+            return None
+
+    async def fetch_area(self, planning_area: str) -> Dict[str, Optional[List[Dict]]]:
+        """Search every category of one planning area concurrently"""
+        results = await asyncio.gather(*[
+            self.fetch_category(planning_area, category) for category in SEARCH_CATEGORIES
+        ])
+        return {category['type']: result for category, result in zip(SEARCH_CATEGORIES, results)}
+
+    async def crawl_area(self, planning_area: str) -> List[Dict]:
+        """Search and enrich one area, reporting it through on_area_complete as soon as it is done"""
+        results_by_type = await self.fetch_area(planning_area)
+        failed_categories = [loc_type for loc_type, results in results_by_type.items() if results is None]
+        get_instrumentation().detail(f"\n=== Searched {planning_area} ===")
+        results_by_type = {loc_type: results or [] for loc_type, results in results_by_type.items()}
+        locations = enrich_area_locations(planning_area, results_by_type)
+        if self.on_area_complete is not None:
+            self.on_area_complete(planning_area, locations, failed_categories)
+        return locations
+
+    async def crawl(self, areas: List[str]) -> List[Dict]:
+        """Crawl all areas and return the enriched locations in area order"""
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight)
+        try:
+            area_results = await asyncio.gather(*[self.crawl_area(area) for area in areas],
+                                                return_exceptions=True)
+        finally:
+            self._executor.shutdown(wait=False)
+
+        all_locations = []
+        for area, locations in zip(areas, area_results):
+            if isinstance(locations, Exception):
+                print(f"Error searching {area}: {locations}")
+                continue
+            all_locations.extend(locations)
+        return all_locations
+
+def crawl_areas_async(areas: List[str], max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                      requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                      max_pages: Optional[int] = None, on_area_complete=None) -> List[Dict]:
+    """Crawl the planning areas concurrently; same output as calling
+    search_all_locations_for_area for each area in turn"""
+    crawler = AsyncCrawler(max_in_flight=max_in_flight, requests_per_second=requests_per_second,
+                           max_pages=max_pages, on_area_complete=on_area_complete)
+    return asyncio.run(crawler.crawl(areas))
@@ -0,0 +1,58 @@
+"""Benchmark crawl throughput and retry behaviour against the local OneMap stub.
+
+Starts onemap_stub_server.py in a background thread with the given latency
+and fault settings, points the finder at it and runs the async crawl.
+
+Run from the repository root:
+
+    python benchmarks/bench_crawl.py
+    python benchmarks/bench_crawl.py --latency lognormal:120:0.6 --error-rate 0.05 --max-in-flight 16 --rate 50
+    python benchmarks/bench_crawl.py --rate-limit 20 --rate 40     # see the 429s and backoff
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_crawler import crawl_areas_async  # noqa: E402
+from instrumentation import configure_instrumentation  # noqa: E402
+from onemap_stub_server import StubState, build_fixtures, start_stub_server  # noqa: E402
+from onemap_transport import configure_onemap, configure_transport  # noqa: E402
+from padel_court_finder_clean_highres import PLANNING_AREAS, print_transport_metrics  # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--areas', type=int, default=len(PLANNING_AREAS), help='Planning areas to crawl')
+    parser.add_argument('--latency', default='lognormal:80:0.5', help='Stub latency spec (see onemap_stub_server.py)')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, default=None)
+    parser.add_argument('--max-in-flight', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=10.0, help='Client-side request rate cap')
+    args = parser.parse_args()
+
+    state = StubState(build_fixtures(), latency=args.latency, error_rate=args.error_rate,
+                      throttle_rate=args.throttle_rate, rate_limit=args.rate_limit)
+    server, base_url = start_stub_server(state)
+    configure_onemap(base_url=base_url)
+    transport = configure_transport(pool_size=args.max_in_flight)
+    configure_instrumentation(quiet=True)
+
+    areas = PLANNING_AREAS[:args.areas]
+    print(f"Crawling {len(areas)} areas against {base_url} (latency {args.latency}, "
+          f"{args.error_rate:.0%} 5xx, {args.throttle_rate:.0%} 429, rate limit {args.rate_limit or 'none'})")
+    start = time.perf_counter()
+    locations = crawl_areas_async(areas, max_in_flight=args.max_in_flight, requests_per_second=args.rate)
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    stats = state.stats()
+    print(f"\n{len(locations):,} locations in {elapsed:.2f}s")
+    print(f"Stub answered {stats['requests']:,} requests ({stats['requests'] / elapsed:.1f} req/s): "
+          f"{stats['status_counts']}")
+    print_transport_metrics(transport.metrics.snapshot())
+
+if __name__ == '__main__':
+    main()
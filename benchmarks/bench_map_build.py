@@ -0,0 +1,108 @@
+"""Benchmark building the map's point layers at increasing row counts.
+
+Compares the old iterrows/row.to_dict marker loop with the vectorized
+prepare_marker_rows + itertuples path, and the data-mode payload. Only
+the layer construction is timed, not writing the HTML.
+
+Run from the repository root:
+
+    python benchmarks/bench_map_build.py                  # 1k, 10k, 100k rows
+    python benchmarks/bench_map_build.py --sizes 1000 5000 --skip-iterrows-above 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+import folium
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generators import make_candidates  # noqa: E402
+from simple_ultra_map import add_data_layers, add_marker_rows, prepare_marker_rows  # noqa: E402
+
+LOCATION_COLORS = {
+    'park_open_space': 'green', 'carpark': 'blue', 'hdb_block': 'red', 'recreation_centre': 'purple',
+    'school': 'orange', 'soccer_court': 'darkgreen', 'rooftop': 'darkblue', 'industrial_space': 'gray',
+    'unknown': 'lightgray',
+}
+
+def new_map():
+    m = folium.Map(location=[1.3521, 103.8198], zoom_start=11)
+    groups = {loc_type: folium.FeatureGroup(name=loc_type).add_to(m) for loc_type in LOCATION_COLORS}
+    return m, groups
+
+def iterrows_markers(df: pd.DataFrame):
+    """The marker loop simple_ultra_map used before, kept here as the baseline"""
+    m, feature_groups = new_map()
+    for index, row in df.iterrows():
+        try:
+            row_dict = row.to_dict()
+            lat = float(row_dict['lat'])
+            lng = float(row_dict['lng'])
+            name = str(row_dict.get('name', 'Unknown'))
+            score = int(row_dict.get('suitability_score', 0))
+            loc_type = str(row_dict.get('type', 'unknown'))
+            color = LOCATION_COLORS.get(loc_type, 'lightgray')
+            popup_html = f"""
+            <div style="width: 300px;">
+                <h4>{name}</h4>
+                <p><strong>Type:</strong> {loc_type.replace('_', ' ').title()}</p>
+                <p><strong>Score:</strong> {score}/100</p>
+                <p><strong>Area:</strong> {row_dict.get('area_estimate_sqm', 'Unknown')} sqm</p>
+                <p><strong>Surface:</strong> {row_dict.get('surface_type', 'Unknown')}</p>
+                <p><strong>Current Use:</strong> {row_dict.get('current_use', 'Unknown')}</p>
+                <p><strong>Address:</strong> {row_dict.get('address', 'Unknown')}</p>
+                <p><strong>Planning Area:</strong> {row_dict.get('planning_area', 'Unknown')}</p>
+                <p><strong>Land Owner:</strong> {row_dict.get('land_owner', 'Unknown')}</p>
+                <p><strong>Permission Required:</strong> {row_dict.get('likely_permission_required_from', 'Unknown')}</p>
+            </div>
+            """
+            marker = folium.Marker(
+                location=[lat, lng],
+                popup=folium.Popup(popup_html, max_width=350),
+                tooltip=f"{name} ({loc_type.replace('_', ' ').title()})",
+                icon=folium.Icon(color=color, icon='info-sign')
+            )
+            marker.add_to(feature_groups.get(loc_type, m))
+        except Exception as e:
+            print(f"Error adding marker for row {index}: {e}")
+    return m
+
+def vectorized_markers(df: pd.DataFrame):
+    m, feature_groups = new_map()
+    add_marker_rows(m, prepare_marker_rows(df, LOCATION_COLORS), feature_groups)
+    return m
+
+def data_layers(df: pd.DataFrame):
+    m, feature_groups = new_map()
+    modes = {loc_type: 'data' for loc_type in df['type'].unique()}
+    add_data_layers(m, df, feature_groups, LOCATION_COLORS, modes)
+    return m
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--skip-iterrows-above', type=int, default=None,
+                        help="Skip the (slow) iterrows baseline for larger sizes")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'iterrows':>10} {'itertuples':>11} {'speedup':>8} {'data payload':>13}")
+    for rows in args.sizes:
+        df = make_candidates(rows)
+        if args.skip_iterrows_above is not None and rows > args.skip_iterrows_above:
+            baseline = float('nan')
+        else:
+            baseline = timed(iterrows_markers, df)
+        vectorized = timed(vectorized_markers, df)
+        payload = timed(data_layers, df)
+        print(f"{rows:>8,} {baseline:>9.2f}s {vectorized:>10.2f}s {baseline / vectorized:>7.1f}x {payload:>12.3f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark batch site scoring against per-record assess_site_suitability.
+
+Run from the repository root:
+
+    python benchmarks/bench_scoring.py            # 1M rows
+    python benchmarks/bench_scoring.py --rows 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generators import make_candidates  # noqa: E402
+from padel_court_finder_clean_highres import assess_site_suitability  # noqa: E402
+from site_scoring import prepare_scoring_columns, score_locations_batch, score_sites_batch  # noqa: E402
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<45} {elapsed:8.3f}s")
+    return result, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--check-rows', type=int, default=100_000,
+                        help="Rows scored with the per-record function for timing and comparison")
+    args = parser.parse_args()
+
+    print(f"Generating {args.rows:,} locations...")
+    locations = make_candidates(args.rows)
+
+    columns, prepare_time = timed("prepare_scoring_columns", lambda: prepare_scoring_columns(locations))
+    scores, score_time = timed("score_sites_batch", lambda: score_sites_batch(columns))
+    _, reasons_time = timed("score_locations_batch (with reasons)", lambda: score_locations_batch(locations))
+
+    sample = locations.head(args.check_rows)
+    records = sample.to_dict('records')
+    expected, loop_time = timed(f"assess_site_suitability x {len(records):,}",
+                                lambda: [assess_site_suitability(record) for record in records])
+    batch = score_locations_batch(sample)
+    identical = (
+        [e['suitability_score'] for e in expected] == batch['suitability_score'].tolist()
+        and [e['recommendation'] for e in expected] == batch['recommendation'].astype(str).tolist()
+        and [e['reasons'] for e in expected] == batch['reasons'].tolist()
+    )
+
+    per_row_loop = loop_time / len(records)
+    per_row_batch = (prepare_time + score_time) / args.rows
+    print(f"\nPer-record loop:  {per_row_loop * 1e6:8.2f} us/row")
+    print(f"Batch (no text):  {per_row_batch * 1e6:8.2f} us/row ({per_row_loop / per_row_batch:.0f}x faster)")
+    print(f"Batch with reasons: {reasons_time / args.rows * 1e6:6.2f} us/row")
+    print(f"Identical to assess_site_suitability on {len(records):,} rows: {identical}")
+    print(f"Score distribution: {scores['recommendation'].value_counts().to_dict()}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Seeded synthetic datasets at Singapore scale for the benchmarks.
+
+Every generator takes a row count and a seed and returns the same frame
+for the same arguments. Points fall inside Singapore's bounding box.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from padel_court_finder_clean_highres import (  # noqa: E402
+    PLANNING_AREAS, SEARCH_CATEGORIES, determine_current_use, determine_land_owner, determine_permission_required,
+    determine_surface_type, estimate_area_for_location, format_residential_proximity,
+)
+
+SG_LAT_RANGE = (1.24, 1.46)
+SG_LNG_RANGE = (103.62, 104.0)
+SG_POSTAL_CODES = 121_135  # postal codes in the Kaggle SG_postal.csv
+
+def _points(rng, rows: int):
+    return rng.uniform(*SG_LAT_RANGE, rows), rng.uniform(*SG_LNG_RANGE, rows)
+
+def _postal_codes(rng, rows: int) -> np.ndarray:
+    return rng.integers(10_000, 830_000, rows)
+
+def _addresses(prefix: np.ndarray, postal: np.ndarray) -> list:
+    return [f"{p} SINGAPORE {code:06d}" for p, code in zip(prefix, postal)]
+
+def make_candidates(rows: int, seed: int = 42, duplicate_rate: float = 0.05) -> pd.DataFrame:
+    """Enriched, scored candidate sites with every column the finder writes.
+
+    About duplicate_rate of the rows repeat an earlier site, half of them
+    exactly (for remove_duplicates) and half a few metres away with the
+    same address (for resolve_entities).
+    """
+    rng = np.random.default_rng(seed)
+    types = np.array([category['type'] for category in SEARCH_CATEGORIES])
+    lat, lng = _points(rng, rows)
+    location_type = types[rng.integers(0, len(types), rows)]
+    street = np.array([f"{i % 999 + 1} SAMPLE ROAD" for i in range(rows)], dtype=object)
+    postal = _postal_codes(rng, rows)
+    names = np.array([f"SITE {i}" for i in range(rows)], dtype=object)
+
+    copies = np.flatnonzero(rng.random(rows) < duplicate_rate)
+    copies = copies[copies > 0]
+    originals = rng.integers(0, copies, len(copies)) if len(copies) else copies
+    nearby = rng.random(len(copies)) < 0.5
+    for column in (names, location_type, street, postal):
+        column[copies] = column[originals]
+    lat[copies] = lat[originals] + np.where(nearby, rng.normal(0, 0.00005, len(copies)), 0)
+    lng[copies] = lng[originals] + np.where(nearby, rng.normal(0, 0.00005, len(copies)), 0)
+
+    frame = pd.DataFrame({
+        'name': names,
+        'address': _addresses(street, postal),
+        'lat': lat,
+        'lng': lng,
+        'type': location_type,
+        'planning_area': np.array(PLANNING_AREAS)[rng.integers(0, len(PLANNING_AREAS), rows)],
+    })
+    frame['area_estimate_sqm'] = frame['type'].map(lambda t: estimate_area_for_location({'type': t}))
+    frame['surface_type'] = frame['type'].map(lambda t: determine_surface_type({'type': t}))
+    frame['current_use'] = frame['type'].map(lambda t: determine_current_use({'type': t}))
+    frame['land_owner'] = frame['type'].map(lambda t: determine_land_owner({'type': t}))
+    frame['likely_permission_required_from'] = frame['type'].map(
+        lambda t: determine_permission_required({'type': t}))
+    frame['accessibility'] = np.where(rng.random(rows) < 0.9, 'public access', 'restricted')
+    proximity = np.array([format_residential_proximity(d) for d in np.round(rng.gamma(2.0, 200.0, rows))],
+                         dtype=object)
+    proximity[rng.random(rows) < 0.05] = 'Unknown'
+    frame['residential_proximity'] = proximity
+    frame['suitability_score'] = rng.integers(20, 101, rows)
+    frame['recommendation'] = np.where(frame['suitability_score'] >= 70, 'High',
+                                       np.where(frame['suitability_score'] >= 50, 'Medium', 'Low'))
+    return frame
+
+def make_hdb_blocks(rows: int, seed: int = 43) -> pd.DataFrame:
+    """HDB blocks in the shape parse_search_results returns them"""
+    rng = np.random.default_rng(seed)
+    lat, lng = _points(rng, rows)
+    block = rng.integers(1, 999, rows)
+    return pd.DataFrame({
+        'name': [f"HDB BLK {b}" for b in block],
+        'address': _addresses(np.array([f"{b} SAMPLE AVENUE" for b in block]), _postal_codes(rng, rows)),
+        'lat': lat,
+        'lng': lng,
+        'type': 'hdb_block',
+        'planning_area': np.array(PLANNING_AREAS)[rng.integers(0, len(PLANNING_AREAS), rows)],
+    })
+
+def make_postal_table(rows: int = SG_POSTAL_CODES, seed: int = 44) -> pd.DataFrame:
+    """Postal code table with SG_postal.csv's columns (codes stored as integers, as in the CSV)"""
+    rng = np.random.default_rng(seed)
+    lat, lon = _points(rng, rows)
+    codes = rng.choice(np.arange(10_000, 830_000), size=min(rows, 820_000), replace=False)
+    return pd.DataFrame({'postal_code': codes, 'lat': lat[:len(codes)], 'lon': lon[:len(codes)]})
+
+def make_clinics(rows: int, postal_table: pd.DataFrame, seed: int = 45) -> pd.DataFrame:
+    """Clinic rows shaped like Dental_Clinics_Acra.csv (postal codes as text).
+
+    About 80% of the postal codes are in postal_table, some without their
+    leading zero; the rest are unknown codes, blanks or 'na'.
+    """
+    rng = np.random.default_rng(seed)
+    known = postal_table['postal_code'].to_numpy()[rng.integers(0, len(postal_table), rows)]
+    postal = np.array([f"{code:06d}" for code in known], dtype=object)
+    unpadded = rng.random(rows) < 0.1
+    postal[unpadded] = [str(code) for code in known[unpadded]]
+    kind = rng.random(rows)
+    postal[kind > 0.8] = [f"{code:06d}" for code in rng.integers(830_000, 999_999, int((kind > 0.8).sum()))]
+    postal[kind > 0.95] = 'na'
+    postal[kind > 0.98] = ''
+    return pd.DataFrame({
+        'entity_name': [f"CLINIC {i} DENTAL" for i in range(rows)],
+        'entity_active': np.where(rng.random(rows) < 0.55, 'Active', 'Non-Active'),
+        'street_name': 'SAMPLE STREET',
+        'building_name': 'na',
+        'unit_no': 'na',
+        'postal_code': postal,
+    })
@@ -0,0 +1,270 @@
+"""Benchmark suite: time and memory-profile each pipeline stage on synthetic data.
+
+Every stage runs on the seeded datasets from generators.py at each size:
+a warm-up run, then up to --repeat timed runs (the best one is reported,
+as timeit does), and once more under tracemalloc for peak memory (skip
+that with --no-memory). Stages that scale badly have a row cap and are
+skipped above it. Results are written as JSON; pass an earlier results
+file as --baseline to compare against it.
+
+Run from the repository root:
+
+    python benchmarks/run_suite.py --output benchmarks/baseline.json
+    python benchmarks/run_suite.py --sizes 1000 10000 --baseline benchmarks/baseline.json
+    python benchmarks/run_suite.py --stages remove_duplicates resolve_entities
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'Dental clinics'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generators import make_candidates, make_clinics, make_hdb_blocks, make_postal_table  # noqa: E402
+from padel_court_finder_clean_highres import (  # noqa: E402
+    assess_residential_proximity, assess_site_suitability, assign_residential_proximity, remove_duplicates,
+)
+from entity_resolution import resolve_entities  # noqa: E402
+from site_scoring import score_locations_batch  # noqa: E402
+from simple_ultra_map import create_simple_ultra_map  # noqa: E402
+from postal_index import compile_postal_index, PostalIndex  # noqa: E402
+from use_kaggle_postal_data import get_coordinates_from_postal_code  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_TOLERANCE = 0.25  # slower than baseline by more than this is a regression
+DEFAULT_REPEAT = 5
+REPEAT_BUDGET_SECONDS = 10.0  # stop repeating a slow stage once its timed runs took this long
+MIN_REGRESSION_SECONDS = 0.005  # smaller slowdowns are timer noise, whatever the ratio
+
+class Datasets:
+    """Generated inputs for one size, built on first use and shared by the stages"""
+
+    def __init__(self, rows: int, workdir: str):
+        self.rows = rows
+        self.workdir = workdir
+        self._cache = {}
+
+    def get(self, name: str, build: Callable):
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    @property
+    def candidates(self) -> pd.DataFrame:
+        return self.get('candidates', lambda: make_candidates(self.rows))
+
+    def candidate_records(self) -> List[Dict]:
+        """Fresh dict records; stages that mutate their input get their own copy"""
+        return self.candidates.to_dict('records')
+
+    @property
+    def hdb_blocks(self) -> List[Dict]:
+        return self.get('hdb_blocks', lambda: make_hdb_blocks(self.rows).to_dict('records'))
+
+    @property
+    def postal_index(self) -> PostalIndex:
+        def build():
+            path = os.path.join(self.workdir, 'SG_postal.csv')
+            self.get('postal_table', make_postal_table).to_csv(path, index=False)
+            compile_postal_index(path, path + '.index.bin')
+            return PostalIndex(path + '.index.bin')
+        return self.get('postal_index', build)
+
+    @property
+    def clinic_postal_codes(self) -> List[str]:
+        return self.get('clinics', lambda: make_clinics(self.rows, self.get('postal_table', make_postal_table))
+                        )['postal_code'].tolist()
+
+    def map_directory(self) -> str:
+        """Directory holding the candidates as the CSV simple_ultra_map loads"""
+        def build():
+            directory = os.path.join(self.workdir, f"map_{self.rows}")
+            os.makedirs(directory, exist_ok=True)
+            self.candidates.to_csv(os.path.join(directory, 'padel_court_locations_CLEAN_HIGHRES.csv'), index=False)
+            return directory
+        return self.get('map_directory', build)
+
+def _in_directory(directory: str, func: Callable):
+    previous = os.getcwd()
+    os.chdir(directory)
+    try:
+        return func()
+    finally:
+        os.chdir(previous)
+
+def _proximity_per_area(data: Datasets):
+    # The per-area pass calls this once per location against that area's blocks
+    blocks_by_area = {}
+    for block in data.hdb_blocks:
+        blocks_by_area.setdefault(block['planning_area'], []).append(block)
+    locations = data.candidate_records()
+    return lambda: [assess_residential_proximity(location, blocks_by_area.get(location['planning_area'], []))
+                    for location in locations]
+
+def _assign_proximity(data: Datasets):
+    locations = data.candidate_records() + [dict(block) for block in data.hdb_blocks]
+    return lambda: assign_residential_proximity(locations)
+
+def _remove_duplicates(data: Datasets):
+    locations = data.candidate_records()
+    return lambda: remove_duplicates(locations)
+
+def _resolve_entities(data: Datasets):
+    locations = data.candidate_records()
+    return lambda: resolve_entities(locations)
+
+def _assess_suitability(data: Datasets):
+    locations = data.candidate_records()
+    return lambda: [assess_site_suitability(location) for location in locations]
+
+def _score_batch(data: Datasets):
+    candidates = data.candidates
+    return lambda: score_locations_batch(candidates)
+
+def _simple_ultra_map(render_mode: str):
+    def setup(data: Datasets):
+        directory = data.map_directory()
+        output = f"bench_{render_mode}.html"
+        return lambda: _in_directory(directory, lambda: create_simple_ultra_map(render_mode=render_mode,
+                                                                                output_file=output))
+    return setup
+
+def _geocode_per_code(data: Datasets):
+    index, codes = data.postal_index, data.clinic_postal_codes
+    return lambda: [get_coordinates_from_postal_code(code, index) for code in codes]
+
+def _geocode_batch(data: Datasets):
+    index, codes = data.postal_index, data.clinic_postal_codes
+    return lambda: index.geocode(codes)
+
+# name -> (setup returning the timed callable, largest row count it runs at)
+STAGES = {
+    'assess_residential_proximity': (_proximity_per_area, 10_000),
+    'assign_residential_proximity': (_assign_proximity, 1_000_000),
+    'remove_duplicates': (_remove_duplicates, 1_000_000),
+    'resolve_entities': (_resolve_entities, 100_000),
+    'assess_site_suitability': (_assess_suitability, 1_000_000),
+    'score_locations_batch': (_score_batch, 1_000_000),
+    'create_simple_ultra_map[markers]': (_simple_ultra_map('markers'), 1_000),
+    'create_simple_ultra_map[data]': (_simple_ultra_map('data'), 1_000_000),
+    'get_coordinates_from_postal_code': (_geocode_per_code, 100_000),
+    'PostalIndex.geocode': (_geocode_batch, 1_000_000),
+}
+
+def measure(run: Callable, memory: bool, repeat: int = DEFAULT_REPEAT) -> Dict:
+    """Best and median wall time of run() over up to repeat runs after a warm-up,
+    and its tracemalloc peak from one more run when memory is set. Stage output
+    is swallowed so per-item prints do not distort the timing."""
+    times = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        run()
+        while len(times) < repeat and (not times or sum(times) < REPEAT_BUDGET_SECONDS):
+            gc.collect()
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        peak_mb = None
+        if memory:
+            gc.collect()
+            tracemalloc.start()
+            try:
+                run()
+                peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            finally:
+                tracemalloc.stop()
+    return {'seconds': round(min(times), 4), 'median_seconds': round(float(np.median(times)), 4),
+            'repeats': len(times), 'peak_mb': None if peak_mb is None else round(peak_mb, 2)}
+
+def run_suite(sizes: List[int], stages: List[str], memory: bool = True,
+              repeat: int = DEFAULT_REPEAT) -> List[Dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in sizes:
+            data = Datasets(rows, workdir)
+            for name in stages:
+                setup, max_rows = STAGES[name]
+                if rows > max_rows:
+                    continue
+                result = {'stage': name, 'rows': rows, **measure(setup(data), memory, repeat)}
+                results.append(result)
+                peak = '' if result['peak_mb'] is None else f"{result['peak_mb']:10.1f} MB"
+                print(f"{name:<34} {rows:>10,} {result['seconds']:10.3f}s {peak}", flush=True)
+    return results
+
+def environment() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[Dict]:
+    """Print each result against the baseline's matching (stage, rows); return the regressions.
+    A regression is slower by more than tolerance and by more than MIN_REGRESSION_SECONDS."""
+    previous = {(item['stage'], item['rows']): item for item in baseline.get('results', [])}
+    regressions = []
+    print(f"\n{'stage':<34} {'rows':>10} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    for result in results:
+        before = previous.get((result['stage'], result['rows']))
+        if before is None or not before['seconds']:
+            continue
+        ratio = result['seconds'] / before['seconds']
+        slower = result['seconds'] - before['seconds']
+        flag = '  REGRESSION' if ratio > 1 + tolerance and slower > MIN_REGRESSION_SECONDS else ''
+        print(f"{result['stage']:<34} {result['rows']:>10,} {before['seconds']:9.3f}s "
+              f"{result['seconds']:9.3f}s {ratio:6.2f}x{flag}")
+        if flag:
+            regressions.append({**result, 'baseline_seconds': before['seconds'], 'ratio': round(ratio, 3)})
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc run of each stage")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help="Timed runs per stage after the warm-up; the best is reported (default: 5)")
+    parser.add_argument('--output', default='benchmarks/results.json', help="Where to write the results JSON")
+    parser.add_argument('--baseline', default=None, help="Earlier results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Slowdown ratio above 1 reported as a regression (default: 0.25)")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    print(f"{'stage':<34} {'rows':>10} {'time':>11} {'peak memory':>13}")
+    results = run_suite(args.sizes, args.stages, memory=not args.no_memory, repeat=args.repeat)
+    report = {'environment': environment(), 'results': results}
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        report['regressions'] = regressions
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than the baseline by more than {args.tolerance:.0%}")
+            status = 1
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
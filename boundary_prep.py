@@ -0,0 +1,310 @@
+import copy
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import folium
+from branca.element import MacroElement
+from jinja2 import Template
+
+from spatial_join import AREA_NAME_PROPERTY, DEFAULT_BOUNDARIES_FILE, geometry_polygons
+
+DEFAULT_INCOME_FILE = 'singapore_household_income_data.csv'
+# (min_zoom, tolerance in degrees): ~220 m, ~55 m and ~11 m, about 2-3 screen
+# pixels at the coarsest zoom each level is shown at
+BOUNDARY_LEVELS = ((0, 0.002), (12, 0.0005), (14, 0.0001))
+COORDINATE_DECIMALS = 6
+
+def income_color(income: float) -> str:
+    """Fill colour of the household income choropleth (blue scale)"""
+    if income < 5000:
+        return '#e3f2fd'  # Very light blue
+    elif income < 8000:
+        return '#90caf9'  # Light blue
+    elif income < 12000:
+        return '#42a5f5'  # Medium blue
+    elif income < 15000:
+        return '#1976d2'  # Dark blue
+    else:
+        return '#0d47a1'  # Very dark blue
+
+def douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Mask of the points Douglas-Peucker keeps; the two end points are always kept"""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        inner = points[start + 1:end]
+        ab = b - a
+        length_sq = float(ab @ ab)
+        if length_sq == 0:
+            distance = np.hypot(*(inner - a).T)
+        else:
+            t = np.clip((inner - a) @ ab / length_sq, 0, 1)
+            distance = np.hypot(*(inner - (a + t[:, None] * ab)).T)
+        i = int(np.argmax(distance))
+        if distance[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+def _simplify_arc(arc: Tuple, tolerance: float) -> List:
+    points = np.array(arc, dtype=np.float64)
+    if arc[0] == arc[-1] and len(arc) > 3:
+        # A closed arc (a ring with no junctions): split at its farthest point
+        # so both halves keep a vertex and the ring cannot collapse
+        far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+        keep = np.concatenate([douglas_peucker(points[:far + 1], tolerance)[:-1],
+                               douglas_peucker(points[far:], tolerance)])
+    else:
+        keep = douglas_peucker(points, tolerance)
+    return [arc[i] for i in np.flatnonzero(keep)]
+
+class BoundaryTopology:
+    """Polygon rings of a FeatureCollection cut into shared arcs.
+
+    A vertex is a junction when it does not have exactly two distinct
+    neighbours across all rings, i.e. where a boundary shared by two areas
+    meets a third area or stops being shared. Rings are cut at junctions,
+    and every arc is stored once however many rings use it, so simplifying
+    each arc once gives neighbouring areas identical borders: no gaps or
+    slivers appear between them at any tolerance.
+    """
+
+    def __init__(self, geojson: Dict):
+        self.geojson = geojson
+        self.rings = []  # (feature, polygon, ring, vertices without the closing repeat)
+        for feature_id, feature in enumerate(geojson.get('features', [])):
+            for polygon_id, polygon in enumerate(geometry_polygons(feature.get('geometry'))):
+                for ring_id, ring in enumerate(polygon):
+                    vertices = [tuple(point[:2]) for point in ring]
+                    vertices = [p for i, p in enumerate(vertices) if i == 0 or p != vertices[i - 1]]
+                    if len(vertices) > 1 and vertices[0] == vertices[-1]:
+                        vertices.pop()
+                    if len(vertices) >= 3:
+                        self.rings.append((feature_id, polygon_id, ring_id, vertices))
+
+        neighbours = {}
+        for _, _, _, vertices in self.rings:
+            n = len(vertices)
+            for i, vertex in enumerate(vertices):
+                linked = neighbours.setdefault(vertex, set())
+                linked.add(vertices[i - 1])
+                linked.add(vertices[(i + 1) % n])
+        junctions = {vertex for vertex, linked in neighbours.items() if len(linked) != 2}
+
+        self.arcs = {}  # canonical arc -> index
+        self.ring_arcs = []  # per ring: (arc index, reversed)
+        for _, _, _, vertices in self.rings:
+            cuts = [i for i, vertex in enumerate(vertices) if vertex in junctions]
+            if not cuts:
+                cuts = [vertices.index(min(vertices))]  # same anchor for every copy of the ring
+            start = cuts[0]
+            rotated = vertices[start:] + vertices[:start] + [vertices[start]]
+            offsets = [i - start if i >= start else i - start + len(vertices) for i in cuts] + [len(vertices)]
+            pieces = []
+            for begin, end in zip(offsets[:-1], offsets[1:]):
+                arc = tuple(rotated[begin:end + 1])
+                backwards = arc[::-1]
+                if backwards < arc:
+                    pieces.append((self.arcs.setdefault(backwards, len(self.arcs)), True))
+                else:
+                    pieces.append((self.arcs.setdefault(arc, len(self.arcs)), False))
+            self.ring_arcs.append(pieces)
+
+    def simplified(self, tolerance: float, decimals: int = COORDINATE_DECIMALS) -> Dict:
+        """Copy of the FeatureCollection with every shared arc simplified once"""
+        arcs = [_simplify_arc(arc, tolerance) if tolerance > 0 else list(arc) for arc in self.arcs]
+        rings = {}
+        for (feature_id, polygon_id, ring_id, vertices), pieces in zip(self.rings, self.ring_arcs):
+            ring = []
+            for arc_id, backwards in pieces:
+                points = arcs[arc_id][::-1] if backwards else arcs[arc_id]
+                ring.extend(points if not ring else points[1:])
+            if len(set(ring)) < 3:
+                if ring_id > 0:
+                    continue  # a hole simplified away
+                ring = vertices + vertices[:1]  # keep the area itself
+            rings.setdefault((feature_id, polygon_id), []).append(
+                [[round(x, decimals), round(y, decimals)] for x, y in ring])
+
+        result = copy.deepcopy({key: value for key, value in self.geojson.items() if key != 'features'})
+        result['features'] = []
+        for feature_id, feature in enumerate(self.geojson.get('features', [])):
+            polygons = [rings[(feature_id, polygon_id)]
+                        for polygon_id in range(len(geometry_polygons(feature.get('geometry'))))
+                        if (feature_id, polygon_id) in rings and rings[(feature_id, polygon_id)]]
+            if not polygons:
+                geometry = feature.get('geometry')
+            elif len(polygons) == 1:
+                geometry = {'type': 'Polygon', 'coordinates': polygons[0]}
+            else:
+                geometry = {'type': 'MultiPolygon', 'coordinates': polygons}
+            result['features'].append({'type': 'Feature', 'properties': dict(feature.get('properties') or {}),
+                                       'geometry': geometry})
+        return result
+
+def bake_income(geojson: Dict, income_data: Optional[pd.DataFrame],
+                name_property: str = AREA_NAME_PROPERTY) -> List[str]:
+    """Join household income onto each feature's properties in place.
+
+    Adds planning_area (spelled as in the income data), avg_household_income,
+    total_households and fill_color. Areas without income data get None and
+    the lightest colour. Returns the names of those areas.
+    """
+    by_name = {}
+    if income_data is not None:
+        for row in income_data.to_dict('records'):
+            by_name[str(row['planning_area']).upper()] = row
+    unmatched = []
+    for feature in geojson.get('features', []):
+        properties = feature.setdefault('properties', {})
+        name = str(properties.get(name_property, ''))
+        row = by_name.get(name.upper())
+        if row is None:
+            unmatched.append(name)
+        properties['planning_area'] = row['planning_area'] if row else name.title()
+        properties['avg_household_income'] = round(float(row['avg_household_income']), 2) if row else None
+        properties['total_households'] = int(row['total_households']) if row else None
+        properties['fill_color'] = income_color(properties['avg_household_income'] or 0)
+    return unmatched
+
+def prepare_boundary_levels(boundaries: Dict, income_data: Optional[pd.DataFrame] = None,
+                            levels: Sequence[Tuple[int, float]] = BOUNDARY_LEVELS) -> List[Tuple[int, Dict]]:
+    """(min_zoom, simplified FeatureCollection) per level, income and colours baked in"""
+    baked = copy.deepcopy(boundaries)
+    unmatched = bake_income(baked, income_data)
+    if income_data is not None and unmatched:
+        print(f"No income data for {len(unmatched)} planning areas: {', '.join(sorted(unmatched))}")
+    topology = BoundaryTopology(baked)
+    return [(min_zoom, topology.simplified(tolerance)) for min_zoom, tolerance in levels]
+
+def level_path(boundaries_file: str, min_zoom: int) -> str:
+    """planning_areas_boundaries.geojson -> planning_areas_boundaries.z12.geojson"""
+    stem, extension = os.path.splitext(boundaries_file)
+    return f"{stem}.z{min_zoom}{extension}"
+
+def write_boundary_levels(prepared: List[Tuple[int, Dict]], boundaries_file: str = DEFAULT_BOUNDARIES_FILE):
+    for min_zoom, geojson in prepared:
+        path = level_path(boundaries_file, min_zoom)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(geojson, f, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+
+def load_boundary_levels(boundaries_file: str = DEFAULT_BOUNDARIES_FILE, income_file: str = DEFAULT_INCOME_FILE,
+                         levels: Sequence[Tuple[int, float]] = BOUNDARY_LEVELS) -> Optional[List[Tuple[int, Dict]]]:
+    """Prepared boundary levels, rebuilt next to boundaries_file when missing or
+    older than the boundaries or income file; None without boundaries"""
+    paths = [level_path(boundaries_file, min_zoom) for min_zoom, _ in levels]
+    sources = [path for path in (boundaries_file, income_file) if os.path.exists(path)]
+    newest_source = max((os.path.getmtime(path) for path in sources), default=0)
+    if all(os.path.exists(path) and os.path.getmtime(path) >= newest_source for path in paths):
+        prepared = []
+        for (min_zoom, _), path in zip(levels, paths):
+            with open(path, 'r') as f:
+                prepared.append((min_zoom, json.load(f)))
+        return prepared
+
+    if not os.path.exists(boundaries_file):
+        print(f"Warning: {boundaries_file} not found")
+        return None
+    with open(boundaries_file, 'r') as f:
+        boundaries = json.load(f)
+    income_data = pd.read_csv(income_file) if os.path.exists(income_file) else None
+    print(f"Preparing simplified boundary levels from {boundaries_file}...")
+    prepared = prepare_boundary_levels(boundaries, income_data, levels)
+    write_boundary_levels(prepared, boundaries_file)
+    return prepared
+
+class ZoomBoundaryLayer(MacroElement):
+    """Boundary polygons that switch to a more detailed level as the map zooms in.
+
+    Add it to a FeatureGroup. levels is a list of (min_zoom, FeatureCollection)
+    as from load_boundary_levels; only the level for the current zoom is
+    drawn. style is the Leaflet path style of every area; fill_property
+    names a feature property holding its fillColor. tooltip is a
+    (property, label) pair.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = (function(group, map, levels, options) {
+            function escapeHtml(value) {
+                return String(value).replace(/[&<>"']/g, function(c) {
+                    return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+                });
+            }
+            var layers = levels.map(function(level) {
+                return {minZoom: level[0], layer: L.geoJSON(level[1], {
+                    style: function(feature) {
+                        var style = Object.assign({}, options.style);
+                        if (options.fill_property && feature.properties[options.fill_property]) {
+                            style.fillColor = feature.properties[options.fill_property];
+                        }
+                        return style;
+                    },
+                    onEachFeature: options.tooltip ? function(feature, layer) {
+                        layer.bindTooltip(escapeHtml(options.tooltip[1]) + ' ' +
+                                          escapeHtml(feature.properties[options.tooltip[0]]), {sticky: true});
+                    } : null
+                })};
+            });
+            function update() {
+                var zoom = map ? map.getZoom() : 0, current = layers[0];
+                layers.forEach(function(level) { if (zoom >= level.minZoom) current = level; });
+                layers.forEach(function(level) {
+                    if (level === current) { if (!group.hasLayer(level.layer)) group.addLayer(level.layer); }
+                    else if (group.hasLayer(level.layer)) group.removeLayer(level.layer);
+                });
+            }
+            if (map) map.on('zoomend', update);
+            update();
+            return layers;
+        })({{ this._parent.get_name() }}, {{ this.map_name }}, {{ this.levels|tojson }}, {{ this.options|tojson }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, levels: List[Tuple[int, Dict]], style: Optional[Dict] = None,
+                 fill_property: Optional[str] = None, tooltip: Optional[Tuple[str, str]] = None):
+        super().__init__()
+        self._name = 'ZoomBoundaryLayer'
+        self.levels = sorted(levels, key=lambda level: level[0])
+        self.options = {'style': style or {}, 'fill_property': fill_property,
+                        'tooltip': list(tooltip) if tooltip else None}
+
+    def render(self, **kwargs):
+        element = self._parent
+        while element is not None and not isinstance(element, folium.Map):
+            element = element._parent
+        self.map_name = element.get_name() if element is not None else 'null'
+        super().render(**kwargs)
+
+def add_boundary_layer(m, levels: List[Tuple[int, Dict]], name: str, show: bool = True,
+                       **layer_options) -> folium.FeatureGroup:
+    """Add a FeatureGroup called name holding a ZoomBoundaryLayer of levels"""
+    group = folium.FeatureGroup(name=name, show=show).add_to(m)
+    ZoomBoundaryLayer(levels, **layer_options).add_to(group)
+    return group
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Write simplified planning-area boundary levels with income baked in')
+    parser.add_argument('--boundaries', default=DEFAULT_BOUNDARIES_FILE, help='Planning-area GeoJSON')
+    parser.add_argument('--income', default=DEFAULT_INCOME_FILE, help='Household income CSV')
+    args = parser.parse_args()
+    with open(args.boundaries, 'r') as f:
+        source = json.load(f)
+    income = pd.read_csv(args.income) if os.path.exists(args.income) else None
+    prepared = prepare_boundary_levels(source, income)
+    write_boundary_levels(prepared, args.boundaries)
+    for min_zoom, _ in prepared:
+        path = level_path(args.boundaries, min_zoom)
+        print(f"z{min_zoom}+: {path} ({os.path.getsize(path) / 1024:.0f} KB)")
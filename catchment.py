@@ -0,0 +1,106 @@
+import os
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from boundary_prep import DEFAULT_INCOME_FILE
+from spatial_index import GridIndex
+
+DEFAULT_RADII_M = (200, 500, 1000)
+SCORING_RADIUS_M = 500  # catchment radius the suitability score looks at
+
+def load_area_households(income_file: str = DEFAULT_INCOME_FILE) -> Optional[pd.DataFrame]:
+    """total_households and avg_household_income (and hdb_blocks, the area's
+    total HDB block count, when the file has it) per planning area, indexed
+    by the upper-cased area name; None if the income file is missing"""
+    if not os.path.exists(income_file):
+        print(f"Warning: {income_file} not found")
+        return None
+    income = pd.read_csv(income_file)
+    income.index = income['planning_area'].astype(str).str.upper()
+    return income[[column for column in ('total_households', 'avg_household_income', 'hdb_blocks')
+                   if column in income]]
+
+class CatchmentIndex:
+    """Island-wide index of HDB blocks, each weighted with an estimate of its households.
+
+    A planning area's total_households are spread evenly over its HDB
+    blocks, and each block carries its area's average household income.
+    The blocks are counted from area_households' hdb_blocks when given;
+    otherwise they are the blocks found in the area, so the estimates
+    depend on how complete the crawl was (a crawl capped with --max-pages
+    finds fewer blocks and gives each of them more households). Blocks in areas without household data count as
+    blocks but their households are unknown (NaN): catchments sum the
+    known blocks only, and are NaN when none of their blocks is known.
+    """
+
+    def __init__(self, lat, lng, block_areas: Sequence[str], area_households: Optional[pd.DataFrame] = None):
+        self.index = GridIndex(lat, lng)
+        areas = pd.Series(block_areas, dtype=object).fillna('').astype(str).str.upper()
+        blocks_per_area = areas.map(areas.value_counts())
+        if area_households is not None and 'hdb_blocks' in area_households:
+            blocks_per_area = areas.map(area_households['hdb_blocks']).fillna(blocks_per_area)
+        self.households = self.income = None
+        if area_households is not None:
+            households = areas.map(area_households['total_households']) / blocks_per_area
+            self.households = households.to_numpy(np.float64)
+            self.income = areas.map(area_households['avg_household_income']).to_numpy(np.float64)
+
+    def query(self, lat, lng, radii_m: Sequence[float] = DEFAULT_RADII_M) -> pd.DataFrame:
+        """Catchment of each query point for every radius from one radius query.
+
+        Returns hdb_blocks_{r}m and households_{r}m per radius and
+        catchment_income, the household-weighted average income within
+        SCORING_RADIUS_M (or the largest radius if that is not one of them;
+        NaN without households).
+        """
+        n = len(np.atleast_1d(lat))
+        radii = sorted(radii_m)
+        q, p, d = self.index.query_radius(lat, lng, max(radii))
+        columns = {}
+        if self.households is not None:
+            known = ~np.isnan(self.households[p])
+        for radius in radii:
+            inside = d <= radius
+            columns[f"hdb_blocks_{radius:g}m"] = np.bincount(q[inside], minlength=n).astype(np.int32)
+            if self.households is None:
+                columns[f"households_{radius:g}m"] = np.full(n, np.nan)
+            else:
+                inside &= known
+                households = np.bincount(q[inside], weights=self.households[p[inside]], minlength=n)
+                columns[f"households_{radius:g}m"] = np.where(
+                    np.bincount(q[inside], minlength=n) > 0, np.round(households), np.nan)
+        if self.households is None:
+            columns['catchment_income'] = np.full(n, np.nan)
+            return pd.DataFrame(columns)
+
+        income_radius = SCORING_RADIUS_M if SCORING_RADIUS_M in radii else radii[-1]
+        inside = (d <= income_radius) & known & ~np.isnan(self.income[p])
+        weight = self.households[p[inside]]
+        households = np.bincount(q[inside], weights=weight, minlength=n)
+        income_sum = np.bincount(q[inside], weights=weight * self.income[p[inside]], minlength=n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            columns['catchment_income'] = np.round(np.where(households > 0, income_sum / households, np.nan), 2)
+        return pd.DataFrame(columns)
+
+def is_hdb_block(location: Dict) -> bool:
+    """Whether a location is an HDB block or was merged with one (see resolve_entities,
+    which keeps only the top-scoring record's type); source_types read back from
+    the CSV are the list's text"""
+    source_types = location.get('source_types')
+    if not isinstance(source_types, (list, tuple, str)):
+        source_types = [location.get('type')]
+    return 'hdb_block' in source_types
+
+def catchment_for_locations(locations: Sequence[Dict], area_households: Optional[pd.DataFrame],
+                            radii_m: Sequence[float] = DEFAULT_RADII_M) -> Optional[pd.DataFrame]:
+    """Catchment columns (see CatchmentIndex.query) for each location, using
+    the HDB blocks among them (see is_hdb_block) as the blocks; None if there are none"""
+    blocks = [location for location in locations if is_hdb_block(location)]
+    if not locations or not blocks:
+        return None
+    index = CatchmentIndex([block['lat'] for block in blocks], [block['lng'] for block in blocks],
+                           [block.get('planning_area') for block in blocks], area_households)
+    return index.query([location['lat'] for location in locations], [location['lng'] for location in locations],
+                       radii_m)
@@ -0,0 +1,90 @@
+from typing import Dict, List
+
+DEFAULT_ARROW_FILE = 'padel_court_locations_CLEAN_HIGHRES.arrow'
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("pyarrow is required for the Arrow export; pip install -r requirements.txt") from e
+    return pyarrow
+
+def location_schema():
+    """Typed schema of the location table.
+
+    Low-cardinality text (type, surface, owner, ...) is dictionary encoded
+    so it loads as pandas categoricals, and reasons/source_types are real
+    list columns instead of Python repr strings.
+    """
+    pa = _require_pyarrow()
+    category = pa.dictionary(pa.int16(), pa.string())
+    return pa.schema([
+        ('name', pa.string()),
+        ('address', pa.string()),
+        ('lat', pa.float64()),
+        ('lng', pa.float64()),
+        ('type', category),
+        ('planning_area', category),
+        ('area_estimate_sqm', pa.int32()),
+        ('surface_type', category),
+        ('current_use', category),
+        ('land_owner', category),
+        ('likely_permission_required_from', category),
+        ('accessibility', category),
+        ('residential_proximity', pa.string()),
+        ('residential_distance_m', pa.float64()),
+        ('hdb_blocks_200m', pa.int32()),
+        ('households_200m', pa.float64()),
+        ('hdb_blocks_500m', pa.int32()),
+        ('households_500m', pa.float64()),
+        ('hdb_blocks_1000m', pa.int32()),
+        ('households_1000m', pa.float64()),
+        ('catchment_income', pa.float64()),
+        ('ura_space_link', category),
+        ('onemap_link', pa.string()),
+        ('suitability_score', pa.int16()),
+        ('reasons', pa.list_(pa.string())),
+        ('recommendation', category),
+        ('source_types', pa.list_(pa.string())),
+        ('merged_count', pa.int32()),
+    ])
+
+def locations_to_table(locations: List[Dict]):
+    """Build a typed Arrow table from location dicts.
+
+    Schema columns missing from every record are left out; columns not in
+    the schema are kept with an inferred type.
+    """
+    pa = _require_pyarrow()
+    schema = location_schema()
+    present = []
+    for location in locations:
+        for key in location:
+            if key not in present:
+                present.append(key)
+
+    names, arrays = [], []
+    for field in schema:
+        if field.name in present:
+            names.append(field.name)
+            arrays.append(pa.array([location.get(field.name) for location in locations], type=field.type))
+    for key in present:
+        if key not in schema.names:
+            names.append(key)
+            arrays.append(pa.array([location.get(key) for location in locations]))
+    return pa.Table.from_arrays(arrays, names=names)
+
+def write_locations_arrow(locations: List[Dict], filename: str = DEFAULT_ARROW_FILE):
+    """Write locations as an uncompressed Arrow IPC file, which readers can memory-map"""
+    pa = _require_pyarrow()
+    table = locations_to_table(locations)
+    with pa.OSFile(filename, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return table
+
+def read_locations_arrow(filename: str = DEFAULT_ARROW_FILE):
+    """Memory-map an Arrow IPC location file; the column buffers are not copied"""
+    pa = _require_pyarrow()
+    source = pa.memory_map(filename, 'r')
+    return pa.ipc.open_file(source).read_all()
@@ -0,0 +1,78 @@
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_CHECKPOINT_DIR = 'crawl_checkpoints'
+
+def area_slug(planning_area: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', planning_area.lower()).strip('_')
+
+class CrawlCheckpoint:
+    """One JSON artifact per planning area, written atomically as each area finishes.
+
+    An area is complete when every category search succeeded. Areas with
+    failed searches are still saved (with whatever was found) but are
+    crawled again on the next run, as are areas with no artifact at all.
+    Artifacts written with different crawl settings count as missing.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CHECKPOINT_DIR, settings: Optional[Dict] = None):
+        self.directory = directory
+        self.settings = settings or {}
+        os.makedirs(directory, exist_ok=True)
+
+    def area_path(self, planning_area: str) -> str:
+        return os.path.join(self.directory, f"{area_slug(planning_area)}.json")
+
+    def save(self, planning_area: str, locations: List[Dict], failed_categories: List[str]):
+        """Write an area's enriched locations; a crash mid-write leaves the old file intact"""
+        artifact = {
+            'planning_area': planning_area,
+            'status': 'failed' if failed_categories else 'complete',
+            'failed_categories': failed_categories,
+            'settings': self.settings,
+            'saved_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'locations': locations,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp_', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(artifact, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.area_path(planning_area))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, planning_area: str) -> Optional[Dict]:
+        """The saved artifact for an area, or None if missing, unreadable or from other settings"""
+        try:
+            with open(self.area_path(planning_area), 'r') as f:
+                artifact = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if artifact.get('settings', {}) != self.settings:
+            return None
+        return artifact
+
+    def is_complete(self, planning_area: str) -> bool:
+        artifact = self.load(planning_area)
+        return artifact is not None and artifact.get('status') == 'complete'
+
+    def pending_areas(self, areas: List[str]) -> List[str]:
+        """Areas that still need crawling: missing, failed or stale"""
+        return [area for area in areas if not self.is_complete(area)]
+
+    def load_locations(self, areas: List[str]) -> List[Dict]:
+        """All saved locations, in area order"""
+        all_locations = []
+        for area in areas:
+            artifact = self.load(area)
+            if artifact is not None:
+                all_locations.extend(artifact['locations'])
+        return all_locations
@@ -0,0 +1,133 @@
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List
+
+import numpy as np
+
+from spatial_index import GridIndex
+
+DEFAULT_MATCH_RADIUS_M = 50.0
+DEFAULT_SIMILARITY_THRESHOLD = 0.85
+
+_POSTAL_RE = re.compile(r'SINGAPORE\s+(\d{6})\b')
+_NON_ALNUM_RE = re.compile(r'[^A-Z0-9 ]+')
+_SPACES_RE = re.compile(r'\s+')
+
+def extract_postal_code(address: str) -> str:
+    """Six-digit postal code from a OneMap address, or '' if there is none"""
+    match = _POSTAL_RE.search(address.upper() if isinstance(address, str) else '')
+    return match.group(1) if match else ''
+
+def normalize_text(text: str) -> str:
+    """Uppercase, drop the 'SINGAPORE 123456' suffix and punctuation, collapse spaces"""
+    text = _POSTAL_RE.sub(' ', text.upper() if isinstance(text, str) else '')
+    text = _NON_ALNUM_RE.sub(' ', text)
+    return _SPACES_RE.sub(' ', text).strip()
+
+def similarity(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a, b).ratio()
+
+class _DisjointSet:
+    """Union-find over record indices that refuses to join clusters with
+    different postal codes, so a record without one cannot bridge two
+    distinct sites"""
+
+    def __init__(self, postal_codes: List[str]):
+        self.parent = list(range(len(postal_codes)))
+        self.postal = list(postal_codes)
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        postal_a, postal_b = self.postal[root_a], self.postal[root_b]
+        if postal_a and postal_b and postal_a != postal_b:
+            return
+        # Keep the earlier record as root so cluster order follows input order
+        root, child = min(root_a, root_b), max(root_a, root_b)
+        self.parent[child] = root
+        self.postal[root] = postal_a or postal_b
+
+def find_matching_pairs(locations: List[Dict], radius_m: float = DEFAULT_MATCH_RADIUS_M,
+                        threshold: float = DEFAULT_SIMILARITY_THRESHOLD):
+    """Index pairs (i < j) of records that describe the same physical site.
+
+    Candidate pairs come from a grid-index radius self-join, so only
+    records within radius_m of each other are ever compared. A pair
+    matches when both addresses carry the same postal code. Otherwise the
+    normalized addresses must be at least threshold similar, falling back
+    to the names when either address is empty. Different postal codes
+    never match.
+    """
+    if len(locations) < 2:
+        return []
+    lat = np.array([location.get('lat', 0) for location in locations], dtype=np.float64)
+    lng = np.array([location.get('lng', 0) for location in locations], dtype=np.float64)
+    index = GridIndex(lat, lng, cell_size_m=max(radius_m, 1.0))
+    first, second, _ = index.query_radius(lat, lng, radius_m)
+    keep = first < second
+    first, second = first[keep], second[keep]
+
+    postal = np.array([extract_postal_code(location.get('address', '')) for location in locations], dtype=object)
+    both_postal = (postal[first] != '') & (postal[second] != '')
+    same_postal = both_postal & (postal[first] == postal[second])
+
+    addresses = [normalize_text(location.get('address', '')) for location in locations]
+    names = [normalize_text(location.get('name', '')) for location in locations]
+    matches = list(zip(first[same_postal].tolist(), second[same_postal].tolist()))
+    undecided = ~both_postal
+    for i, j in zip(first[undecided].tolist(), second[undecided].tolist()):
+        if addresses[i] and addresses[j]:
+            score = similarity(addresses[i], addresses[j])
+        else:
+            score = similarity(names[i], names[j])
+        if score >= threshold:
+            matches.append((i, j))
+    return matches
+
+def resolve_entities(locations: List[Dict], radius_m: float = DEFAULT_MATCH_RADIUS_M,
+                     threshold: float = DEFAULT_SIMILARITY_THRESHOLD) -> List[Dict]:
+    """Merge records of the same physical site into one canonical record.
+
+    Records are clustered through find_matching_pairs. Each cluster keeps
+    its highest-scoring record (the first one on ties) and adds
+    source_types, every location type the site was found as, and
+    merged_count, the number of raw records merged into it.
+    """
+    print("Resolving duplicate locations...")
+    clusters = _DisjointSet([extract_postal_code(location.get('address', '')) for location in locations])
+    for i, j in find_matching_pairs(locations, radius_m, threshold):
+        clusters.union(i, j)
+
+    members: Dict[int, List[int]] = {}
+    for i in range(len(locations)):
+        members.setdefault(clusters.find(i), []).append(i)
+
+    resolved = []
+    for root in sorted(members):
+        group = members[root]
+        best = max(group, key=lambda i: (locations[i].get('suitability_score', 0), -i))
+        record = locations[best]
+        source_types = []
+        for i in group:
+            loc_type = locations[i].get('type', '')
+            if loc_type not in source_types:
+                source_types.append(loc_type)
+        record['source_types'] = source_types
+        record['merged_count'] = len(group)
+        resolved.append(record)
+
+    print(f"Merged {len(locations)} records into {len(resolved)} unique sites "
+          f"({len(locations) - len(resolved)} duplicates removed)")
+    return resolved
@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence
+
+METRIC_PREFIX = 'padel'
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels: Dict) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + '}'
+
+def path_size(path: str) -> int:
+    """Size in bytes of a file, or of every file under a directory"""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path)
+
+class Instrumentation:
+    """Stage timings, counters, histograms and output sizes for one pipeline run.
+
+    stage() times a block of work (and its tracemalloc peak when
+    trace_memory is set), count() adds to a labelled counter, and
+    detail() prints a per-item message unless quiet. write() exports
+    everything as JSON, or as Prometheus text for a .prom/.txt path.
+    """
+
+    def __init__(self, pipeline: str = 'finder', quiet: bool = False, trace_memory: bool = False):
+        self.pipeline = pipeline
+        self.quiet = quiet
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, Dict] = {}
+        self.counters: Dict[str, Dict[tuple, float]] = {}
+        self.histograms: Dict[str, Dict] = {}
+        self.files: Dict[str, int] = {}
+        self.peak_memory_bytes = 0
+        self.started_at = time.time()
+        self._stack: List[Dict] = []
+        self._lock = threading.Lock()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def detail(self, message: str):
+        """Print a per-item message (one duplicate, one search, ...) unless quiet"""
+        if not self.quiet:
+            print(message)
+
+    def _memory_peak(self) -> int:
+        if not self.trace_memory or not tracemalloc.is_tracing():
+            return 0
+        peak = tracemalloc.get_traced_memory()[1]
+        # Enclosing stages keep the peak reached so far before it is reset
+        for frame in self._stack:
+            frame['peak'] = max(frame['peak'], peak)
+        self.peak_memory_bytes = max(self.peak_memory_bytes, peak)
+        return peak
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as a stage; a stage run twice adds up"""
+        self._memory_peak()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        frame = {'name': name, 'peak': 0}
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._memory_peak()
+            self._stack.pop()
+            stats = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0, 'peak_memory_bytes': None})
+            stats['seconds'] += seconds
+            stats['calls'] += 1
+            if self.trace_memory:
+                stats['peak_memory_bytes'] = max(stats['peak_memory_bytes'] or 0, frame['peak'])
+
+    def count(self, name: str, value: float = 1, **labels):
+        """Add value to the counter name with these labels"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def count_by(self, name: str, records: Sequence[Dict], *fields: str):
+        """Count records by the values of fields, e.g. per type and planning area"""
+        for record in records:
+            self.count(name, **{field: record.get(field, 'unknown') for field in fields})
+
+    def observe_histogram(self, name: str, buckets: Sequence[float], counts: Sequence[int], count: int,
+                          sum: float):
+        """Record a histogram given as cumulative bucket counts (see
+        TransportMetrics.latency_histogram)"""
+        self.histograms[name] = {'buckets': list(buckets), 'counts': list(counts), 'count': count, 'sum': sum}
+
+    def record_file(self, path: str):
+        """Record the size of an output file or directory, if it was written"""
+        if os.path.exists(path):
+            self.files[path] = path_size(path)
+
+    def to_dict(self) -> Dict:
+        self._memory_peak()
+        return {
+            'pipeline': self.pipeline,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'stages': {name: dict(stats, seconds=round(stats['seconds'], 4)) for name, stats in self.stages.items()},
+            'counters': {name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                         for name, series in self.counters.items()},
+            'histograms': self.histograms,
+            'output_file_bytes': dict(self.files),
+            'peak_memory_bytes': self.peak_memory_bytes if self.trace_memory else None,
+        }
+
+    def to_prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format"""
+        data = self.to_dict()
+        base = {'pipeline': self.pipeline}
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+
+        metric('stage_seconds', 'gauge', 'Wall time spent in each pipeline stage')
+        for name, stats in data['stages'].items():
+            lines.append(f"{METRIC_PREFIX}_stage_seconds{_format_labels({**base, 'stage': name})} {stats['seconds']}")
+        if self.trace_memory:
+            metric('stage_peak_memory_bytes', 'gauge', 'Peak traced Python memory during each stage')
+            for name, stats in data['stages'].items():
+                lines.append(f"{METRIC_PREFIX}_stage_peak_memory_bytes{_format_labels({**base, 'stage': name})} "
+                             f"{stats['peak_memory_bytes']}")
+            metric('peak_memory_bytes', 'gauge', 'Peak traced Python memory over the run')
+            lines.append(f"{METRIC_PREFIX}_peak_memory_bytes{_format_labels(base)} {data['peak_memory_bytes']}")
+
+        for name, series in self.counters.items():
+            metric(f"{name}_total", 'counter', name.replace('_', ' ').capitalize())
+            for key, value in series.items():
+                lines.append(f"{METRIC_PREFIX}_{name}_total{_format_labels({**base, **dict(key)})} {value}")
+
+        for name, histogram in self.histograms.items():
+            metric(name, 'histogram', name.replace('_', ' ').capitalize())
+            for bound, count in zip(histogram['buckets'], histogram['counts']):
+                lines.append(f"{METRIC_PREFIX}_{name}_bucket{_format_labels({**base, 'le': bound})} {count}")
+            lines.append(f"{METRIC_PREFIX}_{name}_bucket{_format_labels({**base, 'le': '+Inf'})} "
+                         f"{histogram['count']}")
+            lines.append(f"{METRIC_PREFIX}_{name}_sum{_format_labels(base)} {histogram['sum']}")
+            lines.append(f"{METRIC_PREFIX}_{name}_count{_format_labels(base)} {histogram['count']}")
+
+        metric('output_file_bytes', 'gauge', 'Size of each output file')
+        for path, size in data['output_file_bytes'].items():
+            lines.append(f"{METRIC_PREFIX}_output_file_bytes{_format_labels({**base, 'file': path})} {size}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str):
+        """Write the metrics to path: Prometheus text for .prom/.txt, JSON otherwise"""
+        if os.path.splitext(path)[1] in ('.prom', '.txt'):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.to_dict(), indent=2, default=str)
+        with open(path, 'w') as f:
+            f.write(content)
+        print(f"Metrics saved to {path}")
+
+    def print_stages(self):
+        """Print the stage timings (and peaks) in run order"""
+        for name, stats in self.stages.items():
+            peak = stats['peak_memory_bytes']
+            memory = f", peak {peak / (1024 * 1024):.1f} MB" if peak is not None else ''
+            print(f"  {name}: {stats['seconds']:.2f}s{memory}")
+
+    def close(self):
+        if self.trace_memory and tracemalloc.is_tracing():
+            self._memory_peak()
+            tracemalloc.stop()
+
+# Instrumentation shared by every module in the process
+_instrumentation: Optional[Instrumentation] = None
+_instrumentation_lock = threading.Lock()
+
+def configure_instrumentation(**kwargs) -> Instrumentation:
+    """Replace the shared instrumentation, e.g. to make a run quiet or trace memory"""
+    global _instrumentation
+    with _instrumentation_lock:
+        if _instrumentation is not None:
+            _instrumentation.close()
+        _instrumentation = Instrumentation(**kwargs)
+        return _instrumentation
+
+def get_instrumentation() -> Instrumentation:
+    global _instrumentation
+    with _instrumentation_lock:
+        if _instrumentation is None:
+            _instrumentation = Instrumentation()
+        return _instrumentation
@@ -0,0 +1,62 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+TILE_SIZE = 256  # Web Mercator pixels per tile
+DEFAULT_CELL_PX = 64
+DEFAULT_CLUSTER_MAX_ZOOM = 15  # deeper zooms draw the individual points
+MAX_MERCATOR_LAT = 85.05112878
+
+def mercator_pixels(lat: np.ndarray, lng: np.ndarray, zoom: int):
+    """Web Mercator world pixel coordinates (the ones Leaflet uses) at a zoom level"""
+    lat = np.clip(np.asarray(lat, dtype=np.float64), -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT)
+    lng = np.asarray(lng, dtype=np.float64)
+    scale = TILE_SIZE * 2.0 ** zoom
+    x = (lng + 180.0) / 360.0 * scale
+    sin_lat = np.sin(np.radians(lat))
+    y = (0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)) * scale
+    return x, y
+
+def build_zoom_clusters(lat: np.ndarray, lng: np.ndarray, score: Optional[np.ndarray] = None,
+                        min_zoom: int = 0, max_zoom: int = DEFAULT_CLUSTER_MAX_ZOOM,
+                        cell_px: int = DEFAULT_CELL_PX, decimals: int = 6) -> Dict:
+    """Grid clusters for every zoom level from max_zoom down to min_zoom.
+
+    Points are binned into cell_px-sized squares of screen pixels. Because
+    pixel coordinates double with each zoom level, a cell at zoom z is
+    exactly four cells at z + 1, so the levels nest: cells are computed
+    once at max_zoom and halved for each coarser level. Each cluster has
+    the centroid of its points, their count and their average score (over
+    the points that have one; None if none do).
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    if score is None:
+        score = np.full(len(lat), np.nan)
+    score = np.asarray(score, dtype=np.float64)
+    has_score = ~np.isnan(score)
+    score = np.where(has_score, score, 0.0)
+
+    x, y = mercator_pixels(lat, lng, max_zoom)
+    cell_x = np.floor(x / cell_px).astype(np.int64)
+    cell_y = np.floor(y / cell_px).astype(np.int64)
+
+    levels = {}
+    for zoom in range(max_zoom, min_zoom - 1, -1):
+        keys = (cell_x << 32) | cell_y
+        _, cluster, count = np.unique(keys, return_inverse=True, return_counts=True)
+        cluster = cluster.ravel()
+        scored = np.bincount(cluster, weights=has_score)
+        score_sum = np.bincount(cluster, weights=score)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_score = np.where(scored > 0, score_sum / scored, np.nan)
+        levels[str(zoom)] = {
+            'lat': np.round(np.bincount(cluster, weights=lat) / count, decimals).tolist(),
+            'lng': np.round(np.bincount(cluster, weights=lng) / count, decimals).tolist(),
+            'count': count.tolist(),
+            'avg_score': [None if np.isnan(value) else round(float(value), 1) for value in avg_score],
+        }
+        cell_x >>= 1
+        cell_y >>= 1
+
+    return {'min_zoom': min_zoom, 'max_zoom': max_zoom, 'cell_px': cell_px, 'levels': levels}
@@ -0,0 +1,597 @@
+import base64
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import folium
+from branca.element import Element, MacroElement
+from jinja2 import Template
+
+# How point layers are drawn:
+#   markers - one folium.Marker with inlined popup HTML per point (the original output)
+#   data    - all points in one columnar payload; popups/tooltips rendered client-side
+#   canvas  - the same payload drawn as circle markers on one shared canvas, for 100k+ points
+RENDER_MODES = ('markers', 'data', 'canvas')
+COORDINATE_DECIMALS = 6  # ~0.1 m, plenty for a marker
+
+# Leaflet.awesome-markers colour names as fill colours for canvas circles
+MARKER_COLOR_HEX = {
+    'red': '#d63e2a', 'darkred': '#a23336', 'lightred': '#ff8e7f', 'orange': '#f69730',
+    'beige': '#ffcb92', 'green': '#72b026', 'darkgreen': '#728224', 'lightgreen': '#bbf970',
+    'blue': '#38aadd', 'darkblue': '#0067a3', 'lightblue': '#8adaff', 'purple': '#d252b9',
+    'darkpurple': '#5b396b', 'cadetblue': '#436978', 'white': '#fbfbfb', 'pink': '#ff91ea',
+    'gray': '#575757', 'black': '#303030', 'lightgray': '#a3a3a3',
+}
+
+# Shared client-side runtime, added to the page header once however many layers use it
+_RUNTIME_JS = """
+var DataPointLayer = (function () {
+    var ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'};
+    var TYPED_ARRAYS = {uint8: Uint8Array, uint16: Uint16Array, int16: Int16Array, int32: Int32Array,
+                        float32: Float32Array};
+    var canvasRenderer = null;
+    var handles = [];  // every layer on the page, for filtering
+    var activeFilter = null;
+
+    function escapeHtml(value) {
+        return String(value === null || value === undefined ? '' : value)
+            .replace(/[&<>"']/g, function (c) { return ESCAPES[c]; });
+    }
+
+    function decodeTyped(data) {
+        // Base64 little-endian buffers -> typed arrays, once per payload
+        data.typed = data.typed || {};
+        for (var key in data.typed) {
+            var column = data.typed[key];
+            if (typeof column.data === 'string') {
+                var raw = atob(column.data);
+                var bytes = new Uint8Array(raw.length);
+                for (var b = 0; b < raw.length; b++) { bytes[b] = raw.charCodeAt(b); }
+                data.typed[key] = new TYPED_ARRAYS[column.dtype](bytes.buffer);
+            }
+        }
+    }
+
+    function column(data, key) {
+        return data.fields[key] !== undefined ? data.fields[key] : data.typed[key];
+    }
+
+    function value(data, key, i) {
+        var values = column(data, key);
+        if (values === undefined) { return undefined; }
+        var v = values[i];
+        var labels = data.dicts[key];
+        return labels && v !== null ? labels[v] : v;
+    }
+
+    function render(template, data, i) {
+        return template.replace(/\\{(\\w+)\\}/g, function (_, key) { return escapeHtml(value(data, key, i)); });
+    }
+
+    function styleFor(options, data, i) {
+        var styles = options.styles || {};
+        var key = options.category_field ? value(data, options.category_field, i) : null;
+        return styles[key] || styles['default'] || {};
+    }
+
+    function makeLayer(options, data, i) {
+        var style = styleFor(options, data, i);
+        var latlng = [data.lat[i], data.lng[i]];
+        if (options.render === 'canvas') {
+            // One canvas for every circle on the page instead of a DOM node per point
+            canvasRenderer = canvasRenderer || L.canvas({padding: 0.5});
+            return L.circleMarker(latlng, L.extend({renderer: canvasRenderer, data: data, index: i}, style.circle));
+        }
+        var icons = options.icons = options.icons || {};
+        var iconKey = JSON.stringify(style.icon || {});
+        if (!(iconKey in icons)) {
+            icons[iconKey] = L.AwesomeMarkers.icon(L.extend({icon: 'info-sign', prefix: 'glyphicon'}, style.icon));
+        }
+        return L.marker(latlng, {icon: icons[iconKey], data: data, index: i});
+    }
+
+    function tileXY(lat, lng, zoom) {
+        var n = Math.pow(2, zoom);
+        var sinLat = Math.sin(Math.max(-85.05, Math.min(85.05, lat)) * Math.PI / 180);
+        var x = Math.floor((lng + 180) / 360 * n);
+        var y = Math.floor((0.5 - Math.log((1 + sinLat) / (1 - sinLat)) / (4 * Math.PI)) * n);
+        return [Math.max(0, Math.min(n - 1, x)), Math.max(0, Math.min(n - 1, y))];
+    }
+
+    function quadkey(x, y, zoom) {
+        var key = '';
+        for (var level = zoom; level > 0; level--) {
+            var mask = 1 << (level - 1);
+            key += ((x & mask) ? 1 : 0) + ((y & mask) ? 2 : 0);
+        }
+        return key;
+    }
+
+    function fetchTile(url) {
+        var plain = function () {
+            return fetch(url).then(function (response) {
+                if (!response.ok) { throw new Error(url + ': HTTP ' + response.status); }
+                return response.json();
+            });
+        };
+        if (!window.DecompressionStream) { return plain(); }
+        // Prefer the pre-compressed file; fall back to plain JSON if the server cannot provide it
+        return fetch(url + '.gz').then(function (response) {
+            if (!response.ok) { throw new Error(url + '.gz: HTTP ' + response.status); }
+            return new Response(response.body.pipeThrough(new DecompressionStream('gzip'))).json();
+        }).catch(plain);
+    }
+
+    function addTiles(map, handle) {
+        // Fetch each tile in view once, the first time the layer is shown over it
+        var group = handle.group;
+        var tiles = handle.options.tiles;
+        var requested = {};
+        function load(key) {
+            requested[key] = true;
+            fetchTile(tiles.url + '/' + key + '.json').then(function (data) {
+                addChunk(handle, data);
+            }).catch(function (error) {
+                requested[key] = false;
+                console.error('Could not load tile', key, error);
+            });
+        }
+        function loadVisible() {
+            if (!map.hasLayer(group)) { return; }
+            var bounds = map.getBounds();
+            var nw = tileXY(bounds.getNorth(), bounds.getWest(), tiles.zoom);
+            var se = tileXY(bounds.getSouth(), bounds.getEast(), tiles.zoom);
+            for (var x = nw[0]; x <= se[0]; x++) {
+                for (var y = nw[1]; y <= se[1]; y++) {
+                    var key = quadkey(x, y, tiles.zoom);
+                    if (key in tiles.counts && !requested[key]) { load(key); }
+                }
+            }
+        }
+        map.on('moveend', loadVisible);
+        group.on('add', loadVisible);
+    }
+
+    function clusterIcon(count, color) {
+        var size = Math.round(26 + 8 * Math.log(count) / Math.LN10);
+        return L.divIcon({
+            className: '',
+            iconSize: [size, size],
+            html: '<div style="width:' + size + 'px;height:' + size + 'px;line-height:' + size + 'px;' +
+                  'background:' + color + ';opacity:0.9;border:2px solid #fff;border-radius:50%;' +
+                  'color:#fff;font:bold 11px sans-serif;text-align:center">' + count + '</div>'
+        });
+    }
+
+    function isFiltering(filter) {
+        if (!filter) { return false; }
+        var include = filter.include || {}, min = filter.min || {};
+        return Object.keys(include).some(function (key) { return include[key] !== null; }) ||
+               Object.keys(min).some(function (key) { return min[key] !== null; });
+    }
+
+    function clusterVisible(map, handle, zoom, cellPx) {
+        // The same pixel grid as map_clustering.build_zoom_clusters, over the points the filter shows
+        var cells = {}, order = [];
+        var scoreField = handle.options.score_field;
+        handle.chunks.forEach(function (chunk) {
+            var data = chunk.data;
+            for (var i = 0; i < chunk.layers.length; i++) {
+                if (!chunk.visible[i]) { continue; }
+                var p = map.project([data.lat[i], data.lng[i]], zoom);
+                var key = Math.floor(p.x / cellPx) + ':' + Math.floor(p.y / cellPx);
+                var cell = cells[key];
+                if (!cell) {
+                    cell = cells[key] = {lat: 0, lng: 0, count: 0, score: 0, scored: 0};
+                    order.push(cell);
+                }
+                cell.lat += data.lat[i];
+                cell.lng += data.lng[i];
+                cell.count += 1;
+                var score = scoreField ? value(data, scoreField, i) : null;
+                if (score !== null && score !== undefined && !isNaN(score)) {
+                    cell.score += score;
+                    cell.scored += 1;
+                }
+            }
+        });
+        var level = {lat: [], lng: [], count: [], avg_score: []};
+        order.forEach(function (cell) {
+            level.lat.push(cell.lat / cell.count);
+            level.lng.push(cell.lng / cell.count);
+            level.count.push(cell.count);
+            level.avg_score.push(cell.scored ? Math.round(10 * cell.score / cell.scored) / 10 : null);
+        });
+        return level;
+    }
+
+    function addClusters(map, parent, handle) {
+        // Precomputed clusters for the current zoom replace the points up to clusters.max_zoom.
+        // While a filter is active they are rebuilt from the points it shows; tiled layers
+        // only hold the tiles already in view, so they draw their filtered points instead.
+        var options = handle.options;
+        var points = handle.group;
+        var clusters = options.clusters;
+        var clusterLayer = L.featureGroup();
+        var shownZoom;
+        clusterLayer.bindTooltip(function (layer) {
+            var c = layer.options.cluster;
+            return c.count + (c.count === 1 ? ' site' : ' sites') +
+                   (c.avg_score === null ? '' : ', average score ' + c.avg_score);
+        });
+        clusterLayer.on('click', function (e) {
+            map.setView(e.layer.getLatLng(), Math.min(map.getZoom() + 2, clusters.max_zoom + 1));
+        });
+        function update() {
+            var zoom = Math.max(Math.floor(map.getZoom()), clusters.min_zoom);
+            var level = zoom <= clusters.max_zoom ? zoom : null;
+            var filtering = isFiltering(activeFilter);
+            if (filtering && options.tiles) { level = null; }
+            if (level === shownZoom) { return; }
+            shownZoom = level;
+            clusterLayer.clearLayers();
+            if (level === null) {
+                parent.removeLayer(clusterLayer);
+                parent.addLayer(points);
+                return;
+            }
+            parent.removeLayer(points);
+            var c = filtering ? clusterVisible(map, handle, level, clusters.cell_px) : clusters.levels[level];
+            for (var i = 0; i < c.count.length; i++) {
+                clusterLayer.addLayer(L.marker([c.lat[i], c.lng[i]], {
+                    icon: clusterIcon(c.count[i], options.cluster_color),
+                    cluster: {count: c.count[i], avg_score: c.avg_score[i]}
+                }));
+            }
+            parent.addLayer(clusterLayer);
+        }
+        handle.refreshClusters = function () {
+            shownZoom = undefined;
+            update();
+        };
+        map.on('zoomend', update);
+        update();
+    }
+
+    function compileFilter(filter, data) {
+        // Per-payload tests: an allowed flag per dictionary code, or a minimum value
+        var tests = [];
+        if (!filter) { return tests; }
+        Object.keys(filter.include || {}).forEach(function (key) {
+            var values = filter.include[key];
+            var codes = column(data, key);
+            if (values === null || codes === undefined) { return; }
+            var labels = data.dicts[key] || [];
+            var allowed = new Uint8Array(labels.length);
+            for (var c = 0; c < labels.length; c++) { allowed[c] = values.indexOf(labels[c]) >= 0 ? 1 : 0; }
+            tests.push(function (i) { return allowed[codes[i]] === 1; });
+        });
+        Object.keys(filter.min || {}).forEach(function (key) {
+            var minimum = filter.min[key];
+            var values = column(data, key);
+            if (minimum === null || values === undefined) { return; }
+            tests.push(function (i) { return values[i] >= minimum; });
+        });
+        return tests;
+    }
+
+    function applyFilter(handle, chunk) {
+        // Only points whose visibility changed are added to or removed from the group
+        var tests = compileFilter(activeFilter, chunk.data);
+        var shown = 0;
+        for (var i = 0; i < chunk.layers.length; i++) {
+            var keep = 1;
+            for (var t = 0; t < tests.length && keep; t++) { keep = tests[t](i) ? 1 : 0; }
+            if (keep !== chunk.visible[i]) {
+                chunk.visible[i] = keep;
+                if (keep) { handle.group.addLayer(chunk.layers[i]); } else { handle.group.removeLayer(chunk.layers[i]); }
+            }
+            shown += keep;
+        }
+        return shown;
+    }
+
+    function addChunk(handle, data) {
+        decodeTyped(data);
+        var count = data.lat.length;
+        var chunk = {data: data, layers: new Array(count), visible: new Uint8Array(count)};
+        for (var i = 0; i < count; i++) {
+            chunk.layers[i] = makeLayer(handle.options, data, i);
+        }
+        handle.chunks.push(chunk);
+        applyFilter(handle, chunk);
+    }
+
+    function setFilter(filter) {
+        // filter: {include: {field: [labels] or null}, min: {field: number or null}}
+        activeFilter = filter;
+        var counts = {shown: 0, total: 0};
+        handles.forEach(function (handle) {
+            handle.chunks.forEach(function (chunk) {
+                counts.shown += applyFilter(handle, chunk);
+                counts.total += chunk.layers.length;
+            });
+            if (handle.refreshClusters) { handle.refreshClusters(); }
+        });
+        return counts;
+    }
+
+    function addTo(parent, options, data, map) {
+        var group = L.featureGroup();
+        var handle = {options: options, group: group, chunks: []};
+        handles.push(handle);
+        if (data) {
+            addChunk(handle, data);
+        }
+        // Popups and tooltips are bound once on the group and filled for the point under the cursor
+        if (options.popup) {
+            group.bindPopup(function (layer) { return render(options.popup, layer.options.data, layer.options.index); },
+                            {maxWidth: options.popup_max_width});
+        }
+        if (options.tooltip) {
+            group.bindTooltip(function (layer) {
+                return render(options.tooltip, layer.options.data, layer.options.index);
+            });
+        }
+        if (options.tiles && map) {
+            addTiles(map, handle);
+        }
+        if (options.clusters && map) {
+            addClusters(map, parent, handle);
+            return group;
+        }
+        return group.addTo(parent);
+    }
+
+    function addFilterPanel(map, config) {
+        var control = L.control({position: config.position});
+        control.onAdd = function () {
+            var div = L.DomUtil.create('div', 'leaflet-bar');
+            div.style.cssText = 'background:#fff;padding:8px 10px;font:12px sans-serif;min-width:190px;' +
+                                'max-height:70vh;overflow-y:auto';
+            L.DomEvent.disableClickPropagation(div);
+            L.DomEvent.disableScrollPropagation(div);
+            var html = '<b>Filter sites</b>';
+            if (config.score_field) {
+                html += '<div style="margin-top:6px">Score &ge; <span data-score-value>0</span><br>' +
+                        '<input type="range" data-score min="0" max="100" step="5" value="0" style="width:100%"></div>';
+            }
+            config.checkboxes.forEach(function (group, g) {
+                html += '<div style="margin-top:6px"><b>' + escapeHtml(group.label) + '</b>';
+                group.values.forEach(function (v) {
+                    html += '<label style="display:block;font-weight:normal;margin:0">' +
+                            '<input type="checkbox" checked data-group="' + g + '" value="' + escapeHtml(v) + '"> ' +
+                            escapeHtml(v) + '</label>';
+                });
+                html += '</div>';
+            });
+            config.selects.forEach(function (group, g) {
+                html += '<div style="margin-top:6px"><b>' + escapeHtml(group.label) + '</b><br>' +
+                        '<select data-select="' + g + '" style="width:100%"><option value="">All</option>';
+                group.values.forEach(function (v) {
+                    html += '<option value="' + escapeHtml(v) + '">' + escapeHtml(v) + '</option>';
+                });
+                html += '</select></div>';
+            });
+            html += '<div data-count style="margin-top:6px;color:#555"></div>';
+            div.innerHTML = html;
+
+            function update() {
+                var filter = {include: {}, min: {}};
+                if (config.score_field) {
+                    var minimum = Number(div.querySelector('[data-score]').value);
+                    div.querySelector('[data-score-value]').textContent = minimum;
+                    filter.min[config.score_field] = minimum > 0 ? minimum : null;
+                }
+                config.checkboxes.forEach(function (group, g) {
+                    var boxes = div.querySelectorAll('input[data-group="' + g + '"]');
+                    var chosen = [];
+                    for (var b = 0; b < boxes.length; b++) { if (boxes[b].checked) { chosen.push(boxes[b].value); } }
+                    filter.include[group.field] = chosen.length === boxes.length ? null : chosen;
+                });
+                config.selects.forEach(function (group, g) {
+                    var selected = div.querySelector('select[data-select="' + g + '"]').value;
+                    filter.include[group.field] = selected ? [selected] : null;
+                });
+                var start = Date.now();
+                var counts = setFilter(filter);
+                div.querySelector('[data-count]').textContent =
+                    counts.shown + ' of ' + counts.total + ' sites shown (' + (Date.now() - start) + ' ms)';
+            }
+            div.addEventListener('input', update);
+            div.addEventListener('change', update);
+            return div;
+        };
+        control.addTo(map);
+        return control;
+    }
+
+    return {addTo: addTo, addFilterPanel: addFilterPanel, setFilter: setFilter, render: render, value: value};
+})();
+"""
+
+def point_style(color: str, radius: int = 6) -> Dict:
+    """DataPointLayer style for one awesome-markers colour: a pin icon for
+    the data mode and a filled circle for the canvas mode"""
+    return {
+        'icon': {'markerColor': color},
+        'circle': {'radius': radius, 'color': '#ffffff', 'weight': 1,
+                   'fillColor': MARKER_COLOR_HEX.get(color, color), 'fillOpacity': 0.85},
+    }
+
+def _json_value(value):
+    """Plain JSON-safe Python value; NaN and other missing values become None"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value
+
+def _typed_column(values: np.ndarray, dtype: str) -> Dict:
+    """A column as a base64 little-endian buffer, decoded into a JS typed array in the browser"""
+    data = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<')).tobytes()
+    return {'dtype': dtype, 'data': base64.b64encode(data).decode('ascii')}
+
+def _numeric_dtype(column: pd.Series) -> str:
+    """Smallest typed-array type that holds a numeric column exactly"""
+    if pd.api.types.is_integer_dtype(column):
+        if column.empty or (column.min() >= -2 ** 15 and column.max() < 2 ** 15):
+            return 'int16'
+        return 'int32'
+    return 'float32'
+
+def build_point_payload(df: pd.DataFrame, fields: Sequence[str], category_fields: Sequence[str] = (),
+                        missing: str = 'Unknown', typed_fields: Sequence[str] = ()) -> Dict:
+    """Columnar payload of point records for DataPointLayer.
+
+    Coordinates and every field are stored as one array per column, so the
+    per-point cost is the values themselves. Fields in category_fields are
+    dictionary encoded (an integer code per point plus one list of labels).
+    Fields in typed_fields (filterable columns such as score or type) are
+    stored as packed binary arrays instead of JSON lists; they are also
+    available to the templates. Fields the frame lacks, and missing text
+    values, read as missing.
+    """
+    payload = {
+        'lat': np.round(df['lat'].to_numpy(np.float64), COORDINATE_DECIMALS).tolist(),
+        'lng': np.round(df['lng'].to_numpy(np.float64), COORDINATE_DECIMALS).tolist(),
+        'fields': {},
+        'dicts': {},
+        'typed': {},
+    }
+    for field in list(fields) + [field for field in typed_fields if field not in fields]:
+        if field not in df:
+            column = pd.Series(missing, index=df.index, dtype=object)
+        else:
+            column = df[field]
+        if field in category_fields:
+            codes, labels = pd.factorize(column.astype(object).where(column.notna(), missing), sort=True)
+            payload['dicts'][field] = [str(label) for label in labels]
+            if field in typed_fields:
+                payload['typed'][field] = _typed_column(codes, 'uint8' if len(labels) <= 256 else 'uint16')
+            else:
+                payload['fields'][field] = codes.tolist()
+        elif pd.api.types.is_numeric_dtype(column):
+            if field in typed_fields:
+                payload['typed'][field] = _typed_column(column.to_numpy(), _numeric_dtype(column))
+            else:
+                payload['fields'][field] = [_json_value(value) for value in column.tolist()]
+        else:
+            payload['fields'][field] = column.astype(object).where(column.notna(), missing).tolist()
+    return payload
+
+class DataPointLayer(MacroElement):
+    """Every point of a layer drawn from one shared payload.
+
+    Add it to a folium.Map or FeatureGroup. popup and tooltip are HTML
+    templates with {field} placeholders, filled in the browser from the
+    payload (values are HTML-escaped) only when a popup or tooltip is
+    opened. styles maps a category_field value (or 'default') to a
+    point_style-like dict: 'icon' holds Leaflet.awesome-markers options
+    for render='data' (one icon object shared by every point with the same
+    style), 'circle' holds L.circleMarker path options for render='canvas'.
+
+    clusters, from map_clustering.build_zoom_clusters, are drawn instead
+    of the points at zoom levels up to their max_zoom; while a FilterPanel
+    filter is active they are regrouped in the browser from the points it
+    keeps, averaging score_field. With tiles
+    ({'url', 'zoom', 'counts'}, see map_tiles) the payload is None and the
+    points are fetched per map tile as they come into view.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = DataPointLayer.addTo(
+            {{ this._parent.get_name() }},
+            {{ this.options|tojson }},
+            {{ this.payload|tojson }},
+            {{ this.map_name }}
+        );
+        {% endmacro %}
+    """)
+
+    def __init__(self, payload: Optional[Dict], popup: Optional[str] = None, tooltip: Optional[str] = None,
+                 category_field: Optional[str] = None, styles: Optional[Dict] = None,
+                 popup_max_width: int = 300, render: str = 'data', clusters: Optional[Dict] = None,
+                 tiles: Optional[Dict] = None, score_field: Optional[str] = None):
+        super().__init__()
+        if render not in ('data', 'canvas'):
+            raise ValueError(f"DataPointLayer renders 'data' or 'canvas', not {render!r}")
+        self._name = 'DataPointLayer'
+        self.payload = payload
+        self.options = {
+            'popup': popup,
+            'tooltip': tooltip,
+            'category_field': category_field,
+            'styles': styles or {},
+            'popup_max_width': popup_max_width,
+            'render': render,
+            'clusters': clusters,
+            'tiles': tiles,
+            'score_field': score_field,
+            'cluster_color': (styles or {}).get('default', {}).get('circle', {}).get('fillColor', '#3388ff'),
+        }
+
+    def render(self, **kwargs):
+        element = self._parent
+        while element is not None and not isinstance(element, folium.Map):
+            element = element._parent
+        self.map_name = element.get_name() if element is not None else 'null'
+        _add_runtime(self.get_root())
+        super().render(**kwargs)
+
+class FilterPanel(MacroElement):
+    """Map control that filters every DataPointLayer on the page in the browser.
+
+    Add it to the folium.Map. score_field gets a minimum-score slider;
+    checkboxes and selects are lists of (label, field, values) and filter
+    on dictionary-encoded fields. The fields should be typed_fields of the
+    layers' payloads; layers without a field are not filtered on it.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = DataPointLayer.addFilterPanel({{ this._parent.get_name() }}, {{ this.config|tojson }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, score_field: Optional[str] = None, checkboxes: Sequence = (), selects: Sequence = (),
+                 position: str = 'topright'):
+        super().__init__()
+        self._name = 'FilterPanel'
+        self.config = {
+            'score_field': score_field,
+            'checkboxes': [{'label': label, 'field': field, 'values': list(values)}
+                           for label, field, values in checkboxes],
+            'selects': [{'label': label, 'field': field, 'values': list(values)}
+                        for label, field, values in selects],
+            'position': position,
+        }
+
+    def render(self, **kwargs):
+        _add_runtime(self.get_root())
+        super().render(**kwargs)
+
+def _add_runtime(figure):
+    figure.header.add_child(Element(f"<script>{_RUNTIME_JS}</script>"), name='data_point_layer_runtime')
+
+def add_point_layer(parent, df: pd.DataFrame, fields: List[str], category_fields: Sequence[str] = (),
+                    typed_fields: Sequence[str] = (), **layer_options) -> DataPointLayer:
+    """Build the payload for df and add a DataPointLayer for it to parent"""
+    payload = build_point_payload(df, fields, category_fields, typed_fields=typed_fields)
+    layer = DataPointLayer(payload, **layer_options)
+    layer.add_to(parent)
+    return layer
+
+def check_render_mode(render_mode: str):
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode {render_mode!r}; expected one of {', '.join(RENDER_MODES)}")
+
+def parse_layer_render_modes(specs: Optional[List[str]]) -> Dict[str, str]:
+    """Parse LAYER=MODE command-line overrides into a {layer: mode} dict"""
+    modes = {}
+    for spec in specs or []:
+        layer, sep, mode = spec.partition('=')
+        if not sep:
+            raise ValueError(f"Expected LAYER=MODE, got {spec!r}")
+        check_render_mode(mode)
+        modes[layer] = mode
+    return modes
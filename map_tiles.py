@@ -0,0 +1,74 @@
+import glob
+import gzip
+import json
+import os
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from map_clustering import TILE_SIZE, mercator_pixels
+from map_layers import DataPointLayer, build_point_payload
+
+DEFAULT_TILE_ZOOM = 12  # ~10 km tiles, a few dozen cover Singapore
+
+def quadkey(x: int, y: int, zoom: int) -> str:
+    """Bing-style quadkey of a Web Mercator tile"""
+    digits = []
+    for level in range(zoom, 0, -1):
+        mask = 1 << (level - 1)
+        digits.append(str((1 if x & mask else 0) + (2 if y & mask else 0)))
+    return ''.join(digits)
+
+def point_quadkeys(lat: np.ndarray, lng: np.ndarray, zoom: int = DEFAULT_TILE_ZOOM) -> np.ndarray:
+    """Quadkey of the tile each point falls in"""
+    x, y = mercator_pixels(lat, lng, zoom)
+    last = 2 ** zoom - 1
+    tile_x = np.clip(np.floor(x / TILE_SIZE), 0, last).astype(np.int64)
+    tile_y = np.clip(np.floor(y / TILE_SIZE), 0, last).astype(np.int64)
+    tiles, tile_of_point = np.unique(tile_x * (last + 1) + tile_y, return_inverse=True)
+    keys = np.array([quadkey(int(tile // (last + 1)), int(tile % (last + 1)), zoom) for tile in tiles], dtype=object)
+    return keys[tile_of_point.ravel()]
+
+def write_point_tiles(df: pd.DataFrame, fields: Sequence[str], category_fields: Sequence[str], directory: str,
+                      zoom: int = DEFAULT_TILE_ZOOM, typed_fields: Sequence[str] = ()) -> Dict[str, int]:
+    """Split df into one payload file per map tile under directory.
+
+    Each tile is written as <quadkey>.json plus a gzip-compressed
+    <quadkey>.json.gz; tile files left over from an earlier build are
+    removed first. Returns the number of points in each tile.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for stale in glob.glob(os.path.join(directory, '*.json')) + glob.glob(os.path.join(directory, '*.json.gz')):
+        os.remove(stale)
+
+    counts = {}
+    if df.empty:
+        return counts
+    keys = point_quadkeys(df['lat'].to_numpy(), df['lng'].to_numpy(), zoom)
+    for key, tile in df.groupby(keys, sort=True):
+        payload = build_point_payload(tile, fields, category_fields, typed_fields=typed_fields)
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        path = os.path.join(directory, f"{key}.json")
+        with open(path, 'wb') as f:
+            f.write(body)
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(body, mtime=0))
+        counts[key] = len(tile)
+    return counts
+
+def add_tiled_point_layer(parent, df: pd.DataFrame, fields: Sequence[str], category_fields: Sequence[str],
+                          directory: str, url: str, zoom: int = DEFAULT_TILE_ZOOM, typed_fields: Sequence[str] = (),
+                          **layer_options) -> DataPointLayer:
+    """Like map_layers.add_point_layer, but the points go to tile files in
+    directory (served at url, relative to the page) and the page only
+    embeds the tile list, fetching the tiles in view as the map moves"""
+    counts = write_point_tiles(df, fields, category_fields, directory, zoom, typed_fields)
+    layer = DataPointLayer(None, tiles={'url': url, 'zoom': zoom, 'counts': counts}, **layer_options)
+    layer.add_to(parent)
+    return layer
+
+def tile_url(tile_dir: str, output_file: str, layer_name: str) -> str:
+    """URL of a layer's tile directory relative to the HTML page that loads it"""
+    relative = os.path.relpath(os.path.join(tile_dir, layer_name), os.path.dirname(os.path.abspath(output_file)))
+    return relative.replace(os.sep, '/')
@@ -0,0 +1,289 @@
+"""Local stand-in for the OneMap search API, for load tests without network access.
+
+Serves /api/common/elastic/search with OneMap's paginated response shape
+(found, totalNumPages, pageNum, results) from fixture data, with
+configurable latency, injected 429/5xx responses and a request rate limit.
+/stats reports what was served.
+
+    python onemap_stub_server.py --port 8765 --latency lognormal:80:0.5 --error-rate 0.02
+    python padel_court_finder_clean_highres.py --base-url http://127.0.0.1:8765 --no-cache
+
+With --token the stub answers 401 unless the finder sends that token
+(set ONEMAP_TOKEN for the finder).
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from onemap_transport import ONEMAP_SEARCH_PATH
+from padel_court_finder_clean_highres import PLANNING_AREAS, SEARCH_CATEGORIES
+
+DEFAULT_PORT = 8765
+PAGE_SIZE = 10  # OneMap returns ten results per page
+SG_LAT_RANGE = (1.24, 1.46)
+SG_LNG_RANGE = (103.62, 104.0)
+ROAD_SUFFIXES = ['AVENUE', 'STREET', 'ROAD', 'DRIVE', 'CRESCENT']
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Latency sampler (seconds) from a spec in milliseconds:
+    'fixed:MS', 'uniform:LOW:HIGH', 'exponential:MEAN' or 'lognormal:MEDIAN:SIGMA'"""
+    kind, *values = spec.split(':')
+    try:
+        values = [float(value) for value in values]
+    except ValueError:
+        raise ValueError(f"latency values must be numbers: {spec}")
+    if kind == 'fixed' and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == 'exponential' and len(values) == 1:
+        return lambda rng: rng.expovariate(1 / values[0]) / 1000 if values[0] > 0 else 0.0
+    if kind == 'lognormal' and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1]) / 1000 if values[0] > 0 else 0.0
+    raise ValueError(f"unknown latency spec '{spec}' (fixed:MS, uniform:LOW:HIGH, exponential:MEAN, "
+                     f"lognormal:MEDIAN:SIGMA)")
+
+def _search_result(rng: random.Random, name: str, center: Tuple[float, float]) -> Dict:
+    """One result in OneMap's shape (every value a string)"""
+    lat = center[0] + rng.gauss(0, 0.008)
+    lng = center[1] + rng.gauss(0, 0.008)
+    block = str(rng.randint(1, 999))
+    road = f"{rng.choice(['JALAN', 'LORONG', 'TAMAN', 'UPPER', 'NEW'])} {rng.choice(ROAD_SUFFIXES)} {rng.randint(1, 30)}"
+    postal = f"{rng.randint(10000, 829999):06d}"
+    return {
+        'SEARCHVAL': name,
+        'BLK_NO': block,
+        'ROAD_NAME': road,
+        'BUILDING': name,
+        'ADDRESS': f"{block} {road} {name} SINGAPORE {postal}",
+        'POSTAL': postal,
+        'X': f"{(lng - 103.8) * 111_000 + 28_000:.6f}",
+        'Y': f"{(lat - 1.35) * 111_000 + 38_000:.6f}",
+        'LATITUDE': f"{lat:.10f}",
+        'LONGITUDE': f"{lng:.10f}",
+    }
+
+def build_fixtures(seed: int = 0, max_results: int = 60, noise_rate: float = 0.2) -> Dict[str, List[Dict]]:
+    """Synthetic results for every search the finder makes ('<query> <area>').
+
+    Each search gets between 0 and max_results results around a fixed
+    point for its area; about noise_rate of them are unrelated places
+    that the finder's name filters drop, as with the real API.
+    """
+    fixtures = {}
+    for area in PLANNING_AREAS:
+        area_rng = random.Random(zlib.crc32(f"{seed}:{area}".encode()))
+        center = (area_rng.uniform(*SG_LAT_RANGE), area_rng.uniform(*SG_LNG_RANGE))
+        for category in SEARCH_CATEGORIES:
+            search_val = f"{category['query']} {area}"
+            rng = random.Random(zlib.crc32(f"{seed}:{search_val}".encode()))
+            results = []
+            for i in range(rng.randint(0, max_results)):
+                if rng.random() < noise_rate:
+                    name = f"BLK {rng.randint(1, 999)} {area.upper()} {rng.choice(ROAD_SUFFIXES)}"
+                else:
+                    name = f"{area.upper()} {category['query'].upper()} {i + 1}"
+                results.append(_search_result(rng, name, center))
+            fixtures[search_val.lower()] = results
+    return fixtures
+
+def load_fixtures(path: str) -> Dict[str, List[Dict]]:
+    """Fixtures saved as JSON: {searchVal: [result, ...]}; searchVal is matched case-insensitively"""
+    with open(path, 'r') as f:
+        return {search_val.lower(): results for search_val, results in json.load(f).items()}
+
+class StubState:
+    """Fixtures, fault settings and counters shared by the request handlers"""
+
+    def __init__(self, fixtures: Dict[str, List[Dict]], latency: str = 'fixed:0', error_rate: float = 0.0,
+                 error_codes: Tuple[int, ...] = (500, 502, 503), throttle_rate: float = 0.0,
+                 rate_limit: Optional[float] = None, retry_after: float = 1.0, token: Optional[str] = None,
+                 seed: int = 0):
+        self.fixtures = fixtures
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.error_codes = tuple(error_codes)
+        self.throttle_rate = throttle_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.token = token
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.requests = 0
+        self.status_counts: Dict[str, int] = {}
+        self.results_served = 0
+        self._window: List[float] = []  # request times in the last second, for the rate limit
+
+    def decide(self) -> Tuple[float, Optional[int]]:
+        """Latency for the next request, and the failure status to answer
+        with instead of results (None to serve it)"""
+        with self.lock:
+            self.requests += 1
+            latency = max(0.0, self.sample_latency(self.rng))
+            if self.rate_limit:
+                now = time.monotonic()
+                self._window = [t for t in self._window if now - t < 1.0]
+                if len(self._window) >= self.rate_limit:
+                    return latency, 429
+                self._window.append(now)
+            roll = self.rng.random()
+            if roll < self.throttle_rate:
+                return latency, 429
+            if roll < self.throttle_rate + self.error_rate:
+                return latency, self.rng.choice(self.error_codes)
+            return latency, None
+
+    def record(self, status: int, results: int = 0):
+        with self.lock:
+            self.status_counts[str(status)] = self.status_counts.get(str(status), 0) + 1
+            self.results_served += results
+
+    def stats(self) -> Dict:
+        with self.lock:
+            elapsed = time.monotonic() - self.started_at
+            return {
+                'requests': self.requests,
+                'status_counts': dict(self.status_counts),
+                'results_served': self.results_served,
+                'uptime_s': round(elapsed, 3),
+                'requests_per_second': round(self.requests / elapsed, 2) if elapsed > 0 else 0.0,
+            }
+
+    def search_page(self, search_val: str, page_num: int) -> Dict:
+        results = self.fixtures.get(search_val.strip().lower(), [])
+        total_pages = math.ceil(len(results) / PAGE_SIZE)
+        start = (page_num - 1) * PAGE_SIZE
+        return {
+            'found': len(results),
+            'totalNumPages': total_pages,
+            'pageNum': page_num,
+            'results': results[start:start + PAGE_SIZE] if page_num >= 1 else [],
+        }
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = 'OneMapStub/1.0'
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API behind the pooled session
+    # Headers and body go out as separate writes; with Nagle on, the body waits
+    # for the client's delayed ACK and adds ~40 ms to every kept-alive response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass  # one line per request would swamp a load test
+
+    def _send_json(self, status: int, body: Dict, headers: Optional[Dict] = None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        state: StubState = self.server.state
+        url = urlparse(self.path)
+        if url.path == '/stats':
+            self._send_json(200, state.stats())
+            return
+        if url.path != ONEMAP_SEARCH_PATH:
+            state.record(404)
+            self._send_json(404, {'error': 'Not found'})
+            return
+
+        latency, failure = state.decide()
+        time.sleep(latency)
+        if state.token and self.headers.get('Authorization') != f"Bearer {state.token}":
+            state.record(401)
+            self._send_json(401, {'error': 'Invalid token'})
+            return
+        if failure == 429:
+            state.record(429)
+            self._send_json(429, {'error': 'Too many requests'}, {'Retry-After': f"{state.retry_after:g}"})
+            return
+        if failure is not None:
+            state.record(failure)
+            self._send_json(failure, {'error': 'Injected server error'})
+            return
+
+        query = parse_qs(url.query)
+        search_val = query.get('searchVal', [''])[0]
+        try:
+            page_num = int(query.get('pageNum', ['1'])[0])
+        except ValueError:
+            page_num = 1
+        body = state.search_page(search_val, page_num)
+        state.record(200, len(body['results']))
+        self._send_json(200, body)
+
+def make_server(state: StubState, host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """HTTP server answering with state; port 0 picks a free port"""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.state = state
+    return server
+
+def start_stub_server(state: StubState, host: str = '127.0.0.1', port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve in a background thread; returns the server (call shutdown()
+    when done) and its base URL for configure_onemap"""
+    server = make_server(state, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--fixtures', default=None,
+                        help='JSON file of {searchVal: [results]} (default: synthetic results for every search)')
+    parser.add_argument('--write-fixtures', default=None, metavar='PATH',
+                        help='Write the synthetic fixtures to PATH and exit')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic fixtures and the fault injection')
+    parser.add_argument('--max-results', type=int, default=60, help='Most results per synthetic search (default: 60)')
+    parser.add_argument('--latency', default='fixed:0',
+                        help='Per-request latency in ms: fixed:MS, uniform:LOW:HIGH, exponential:MEAN or '
+                             'lognormal:MEDIAN:SIGMA (default: fixed:0)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with a 5xx')
+    parser.add_argument('--error-codes', default='500,502,503', help='5xx codes to inject (default: 500,502,503)')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Share of requests answered with a 429')
+    parser.add_argument('--rate-limit', type=float, default=None,
+                        help='Requests per second above which requests get a 429')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds sent with 429s')
+    parser.add_argument('--token', default=None, help='Require this bearer token (default: accept any)')
+    args = parser.parse_args(argv)
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else build_fixtures(args.seed, args.max_results)
+    if args.write_fixtures:
+        with open(args.write_fixtures, 'w') as f:
+            json.dump(fixtures, f)
+        print(f"Wrote {len(fixtures)} searches to {args.write_fixtures}")
+        return
+    try:
+        state = StubState(fixtures, latency=args.latency, error_rate=args.error_rate,
+                          error_codes=tuple(int(code) for code in args.error_codes.split(',')),
+                          throttle_rate=args.throttle_rate, rate_limit=args.rate_limit,
+                          retry_after=args.retry_after, token=args.token, seed=args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    server = make_server(state, args.host, args.port)
+    print(f"OneMap stub serving {len(fixtures)} searches on http://{args.host}:{server.server_address[1]} "
+          f"(stats at /stats); Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(state.stats(), indent=2))
+
+if __name__ == '__main__':
+    main()
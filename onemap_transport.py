@@ -0,0 +1,297 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentation import get_instrumentation
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"circuit open for {host}, retry in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """Per-host circuit breaker.
+
+    After failure_threshold consecutive failures the host's circuit opens
+    and calls fail fast for reset_timeout seconds. The first call after
+    that is let through as a trial: success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._trial_running = set()
+        self._lock = threading.Lock()
+
+    def before_call(self, host: str):
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return
+            elapsed = time.monotonic() - opened_at
+            if elapsed < self.reset_timeout or host in self._trial_running:
+                raise CircuitOpenError(host, max(0.0, self.reset_timeout - elapsed))
+            self._trial_running.add(host)
+
+    def record_success(self, host: str):
+        with self._lock:
+            self._failures[host] = 0
+            self._opened_at.pop(host, None)
+            self._trial_running.discard(host)
+
+    def record_failure(self, host: str):
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if host in self._trial_running or self._failures[host] >= self.failure_threshold:
+                self._opened_at[host] = time.monotonic()
+            self._trial_running.discard(host)
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            return opened_at is not None and time.monotonic() - opened_at < self.reset_timeout
+
+class TransportMetrics:
+    """Thread-safe latency and retry counters for the shared transport"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: List[float] = []  # seconds, one per HTTP attempt
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.circuit_rejections = 0
+        self.status_counts: Dict[str, int] = {}
+
+    def record_attempt(self, latency: float, status: str):
+        with self._lock:
+            self.latencies.append(latency)
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def record_call(self, attempts: int, succeeded: bool):
+        with self._lock:
+            self.calls += 1
+            self.retries += max(0, attempts - 1)
+            if not succeeded:
+                self.failures += 1
+
+    def record_circuit_rejection(self):
+        with self._lock:
+            self.circuit_rejections += 1
+
+    def latency_histogram(self, buckets=LATENCY_BUCKETS) -> Dict:
+        """Cumulative count of attempts at or under each bucket bound, with the
+        total count and sum in seconds (the Prometheus histogram layout)"""
+        with self._lock:
+            latencies = list(self.latencies)
+        return {
+            'buckets': list(buckets),
+            'counts': [sum(1 for latency in latencies if latency <= bound) for bound in buckets],
+            'count': len(latencies),
+            'sum': sum(latencies),
+        }
+
+    def snapshot(self) -> Dict:
+        """Summarise the counters and latency percentiles (in milliseconds)"""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            summary = {
+                'calls': self.calls,
+                'attempts': len(latencies),
+                'retries': self.retries,
+                'failures': self.failures,
+                'circuit_rejections': self.circuit_rejections,
+                'status_counts': dict(self.status_counts),
+            }
+        if latencies:
+            def percentile(p):
+                return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+            summary['latency_ms'] = {
+                'mean': sum(latencies) / len(latencies) * 1000,
+                'p50': percentile(0.50),
+                'p90': percentile(0.90),
+                'p99': percentile(0.99),
+                'max': latencies[-1] * 1000,
+            }
+        return summary
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class Transport:
+    """Shared HTTP transport for OneMap calls.
+
+    Owns one pooled keep-alive requests.Session, retries transient failures
+    (connection errors and 429/5xx responses) with full-jitter exponential
+    backoff that honours Retry-After, and fails fast through a per-host
+    circuit breaker while a host is down.
+    """
+
+    def __init__(self, pool_size: int = 16, timeout: float = 30.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_cap: float = 30.0, max_retry_after: float = 60.0,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        if max_retries < 1:
+            raise ValueError(f"max_retries must be at least 1 (it counts attempts), got {max_retries}")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_after = max_retry_after
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.metrics = TransportMetrics()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def backoff_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Seconds to wait before the next attempt"""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.max_retry_after)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def get(self, url: str, headers=None, params=None, max_retries: Optional[int] = None) -> requests.Response:
+        """GET with retries; returns the last response (which may still be a
+        retryable status) or raises the last connection error / CircuitOpenError"""
+        host = urlparse(url).netloc
+        max_retries = self.max_retries if max_retries is None else max_retries
+        if max_retries < 1:
+            raise ValueError(f"max_retries must be at least 1 (it counts attempts), got {max_retries}")
+        try:
+            self.breaker.before_call(host)
+        except CircuitOpenError:
+            self.metrics.record_circuit_rejection()
+            raise
+
+        try:
+            return self._attempt(url, host, headers, params, max_retries)
+        except requests.RequestException:
+            raise
+        except BaseException:
+            # Anything else (a bug, KeyboardInterrupt) must not leave a trial call
+            # running, or the host's circuit would reject every later call
+            self.breaker.record_failure(host)
+            raise
+
+    def _attempt(self, url: str, host: str, headers, params, max_retries: int) -> requests.Response:
+        """The retry loop of get, after the circuit breaker let the call through"""
+        response = None
+        error = None
+        attempts = 0
+        for attempt in range(max_retries):
+            attempts += 1
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+                error = None
+                self.metrics.record_attempt(time.perf_counter() - start, str(response.status_code))
+            except requests.RequestException as e:
+                response = None
+                error = e
+                self.metrics.record_attempt(time.perf_counter() - start, type(e).__name__)
+
+            if response is not None and response.status_code not in RETRY_STATUS_CODES:
+                self.breaker.record_success(host)
+                self.metrics.record_call(attempts, succeeded=True)
+                return response
+
+            # Rate limiting says nothing about the host being down
+            if response is not None and response.status_code == 429:
+                self.breaker.record_success(host)
+            else:
+                self.breaker.record_failure(host)
+
+            if attempt == max_retries - 1 or self.breaker.is_open(host):
+                break
+            wait = self.backoff_delay(attempt, response)
+            reason = f"HTTP {response.status_code}" if response is not None else error
+            instrumentation = get_instrumentation()
+            instrumentation.detail(f"Request failed ({reason}), retrying in {wait:.1f}s...")
+            instrumentation.count('onemap_request_retries',
+                                  status=str(response.status_code) if response is not None else type(error).__name__)
+            time.sleep(wait)
+
+        self.metrics.record_call(attempts, succeeded=False)
+        if response is not None:
+            return response
+        raise error
+
+    def close(self):
+        self.session.close()
+
+# Transport shared by every robust_request call in the process
+_transport: Optional[Transport] = None
+_transport_lock = threading.Lock()
+
+def configure_transport(**kwargs) -> Transport:
+    """Replace the shared transport, e.g. to size its connection pool for a crawl"""
+    global _transport
+    with _transport_lock:
+        if _transport is not None:
+            _transport.close()
+        _transport = Transport(**kwargs)
+        return _transport
+
+def get_transport() -> Transport:
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport()
+        return _transport
+
+# OneMap host and bearer token used by the searches. They live here rather
+# than in the finder script so every module (the async crawler, the
+# benchmarks) sees the same values when the finder runs as __main__.
+DEFAULT_ONEMAP_BASE_URL = "https://www.onemap.gov.sg"
+ONEMAP_SEARCH_PATH = "/api/common/elastic/search"
+_onemap_base_url = (os.environ.get('ONEMAP_BASE_URL') or DEFAULT_ONEMAP_BASE_URL).rstrip('/')
+_onemap_token = os.environ.get('ONEMAP_TOKEN') or None
+
+def configure_onemap(base_url: Optional[str] = None, token: Optional[str] = None):
+    """Point the searches at another OneMap host (e.g. onemap_stub_server.py)
+    and/or set the bearer token; arguments left as None keep their value"""
+    global _onemap_base_url, _onemap_token
+    if base_url:
+        _onemap_base_url = base_url.rstrip('/')
+    if token:
+        _onemap_token = token
+
+def onemap_base_url() -> str:
+    return _onemap_base_url
+
+def onemap_token() -> Optional[str]:
+    return _onemap_token
+
+def onemap_search_url() -> str:
+    return _onemap_base_url + ONEMAP_SEARCH_PATH
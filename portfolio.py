@@ -0,0 +1,153 @@
+import heapq
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from catchment import CatchmentIndex, load_area_households
+from spatial_index import GridIndex
+
+DEFAULT_PORTFOLIO_SIZE = 50
+DEFAULT_COVERAGE_RADIUS_M = 1000  # a court serves the households within this walk
+DEFAULT_MIN_SPACING_M = 500  # no two chosen courts closer than this
+PORTFOLIO_COLUMNS = ['name', 'type', 'planning_area', 'address', 'lat', 'lng', 'suitability_score']
+
+def select_portfolio(site_lat, site_lng, demand_lat, demand_lng, demand_weight, k: int = DEFAULT_PORTFOLIO_SIZE,
+                     coverage_radius_m: float = DEFAULT_COVERAGE_RADIUS_M,
+                     min_spacing_m: float = DEFAULT_MIN_SPACING_M, priority=None) -> pd.DataFrame:
+    """Pick up to k sites that together cover the most demand weight.
+
+    A site covers every demand point within coverage_radius_m, and each
+    point counts once however many chosen sites cover it. Greedy max
+    coverage is evaluated lazily: sites sit in a heap keyed by their last
+    known gain, which can only shrink as points get covered, so only the
+    top entry is recomputed and it is taken once its fresh gain still
+    tops the heap. Sites within min_spacing_m of a pick are dropped.
+    Ties go to the higher priority (e.g. suitability score), then the
+    lower index. Stops early when no remaining site adds any demand.
+
+    Returns one row per pick: site (its index), marginal_gain,
+    cumulative_gain and covered_share of the total demand weight.
+    """
+    site_lat = np.asarray(site_lat, dtype=np.float64)
+    site_lng = np.asarray(site_lng, dtype=np.float64)
+    weight = np.asarray(demand_weight, dtype=np.float64)
+    n_sites = len(site_lat)
+    priority = np.zeros(n_sites) if priority is None else np.asarray(priority, dtype=np.float64)
+
+    # Demand points covered by each site, as one CSR slice per site
+    q, p, _ = GridIndex(demand_lat, demand_lng).query_radius(site_lat, site_lng, coverage_radius_m)
+    order = np.argsort(q, kind='stable')
+    covered_by = p[order].astype(np.int32)
+    starts = np.searchsorted(q[order], np.arange(n_sites + 1))
+    gain = np.bincount(q, weights=weight[p], minlength=n_sites)
+
+    spacing_index = GridIndex(site_lat, site_lng)
+    covered = np.zeros(len(weight), dtype=bool)
+    excluded = np.zeros(n_sites, dtype=bool)
+    heap = [(-g, -pr, i) for i, (g, pr) in enumerate(zip(gain, priority)) if g > 0]
+    heapq.heapify(heap)
+
+    picks = []
+    cumulative = 0.0
+    while heap and len(picks) < k:
+        _, neg_priority, site = heapq.heappop(heap)
+        if excluded[site]:
+            continue
+        points = covered_by[starts[site]:starts[site + 1]]
+        fresh = float(weight[points[~covered[points]]].sum())
+        if fresh <= 0:
+            continue
+        entry = (-fresh, neg_priority, site)
+        if heap and heap[0] < entry:
+            heapq.heappush(heap, entry)
+            continue
+        covered[points] = True
+        cumulative += fresh
+        picks.append((site, fresh, cumulative))
+        _, nearby, _ = spacing_index.query_radius([site_lat[site]], [site_lng[site]], min_spacing_m)
+        excluded[nearby] = True
+
+    total = float(weight.sum())
+    result = pd.DataFrame(picks, columns=['site', 'marginal_gain', 'cumulative_gain'])
+    result['covered_share'] = result['cumulative_gain'] / total if total > 0 else 0.0
+    return result
+
+def build_portfolio(locations: pd.DataFrame, k: int = DEFAULT_PORTFOLIO_SIZE,
+                    coverage_radius_m: float = DEFAULT_COVERAGE_RADIUS_M,
+                    min_spacing_m: float = DEFAULT_MIN_SPACING_M, min_score: float = 0,
+                    area_households: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Choose k courts from a location table to cover the most HDB households.
+
+    Demand is the table's HDB blocks, including those merged into another
+    site's row (see is_hdb_block), weighted with their estimated
+    households (see CatchmentIndex). Blocks in areas without household
+    data weigh the mean of the known blocks, and every block weighs one
+    without any household data. Candidates are the sites scoring at least min_score. Returns
+    the picks in order with the site's details and its marginal and
+    cumulative covered households.
+    """
+    is_block = locations['type'] == 'hdb_block'
+    if 'source_types' in locations:
+        is_block |= locations['source_types'].astype(str).str.contains('hdb_block', regex=False)
+    blocks = locations[is_block]
+    if blocks.empty:
+        raise ValueError("no HDB blocks (by type or source_types) to measure residential demand with")
+    demand = CatchmentIndex(blocks['lat'], blocks['lng'], blocks['planning_area'].tolist(), area_households)
+    weight = np.ones(len(blocks))
+    if demand.households is not None:
+        known = ~np.isnan(demand.households)
+        weight = np.where(known, demand.households, demand.households[known].mean() if known.any() else 1.0)
+
+    candidates = locations
+    if 'suitability_score' in locations:
+        candidates = locations[pd.to_numeric(locations['suitability_score'], errors='coerce').fillna(0) >= min_score]
+    priority = (pd.to_numeric(candidates['suitability_score'], errors='coerce').fillna(0).to_numpy()
+                if 'suitability_score' in candidates else None)
+    picks = select_portfolio(candidates['lat'], candidates['lng'], blocks['lat'], blocks['lng'], weight, k=k,
+                             coverage_radius_m=coverage_radius_m, min_spacing_m=min_spacing_m, priority=priority)
+
+    chosen = candidates.iloc[picks['site'].to_numpy()]
+    portfolio = chosen[[column for column in PORTFOLIO_COLUMNS if column in chosen]].reset_index(drop=True)
+    portfolio.insert(0, 'pick', np.arange(1, len(portfolio) + 1))
+    portfolio['marginal_households'] = picks['marginal_gain'].round().to_numpy()
+    portfolio['cumulative_households'] = picks['cumulative_gain'].round().to_numpy()
+    portfolio['covered_share'] = picks['covered_share'].round(4).to_numpy()
+    return portfolio
+
+def build_portfolio_from_records(locations: List[Dict], **kwargs) -> pd.DataFrame:
+    """build_portfolio over location dicts, as the finder holds them"""
+    return build_portfolio(pd.DataFrame(locations), **kwargs)
+
+def print_portfolio(portfolio: pd.DataFrame, limit: Optional[int] = None):
+    """Print each pick with its marginal gain"""
+    for row in portfolio.head(limit).itertuples(index=False):
+        print(f"{row.pick:3d}. {row.name} ({row.type.replace('_', ' ').title()}, {row.planning_area}) "
+              f"+{row.marginal_households:,.0f} households, {row.covered_share:.1%} covered")
+
+def main(argv: Optional[Sequence[str]] = None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Pick k well-spread court sites covering the most HDB households')
+    parser.add_argument('--input', default='padel_court_locations_CLEAN_HIGHRES.csv', help='Location CSV from the finder')
+    parser.add_argument('--output', default='padel_court_portfolio.csv')
+    parser.add_argument('-k', type=int, default=DEFAULT_PORTFOLIO_SIZE, help='Sites to pick (default: 50)')
+    parser.add_argument('--coverage-radius', type=float, default=DEFAULT_COVERAGE_RADIUS_M,
+                        help='Metres a court serves (default: 1000)')
+    parser.add_argument('--min-spacing', type=float, default=DEFAULT_MIN_SPACING_M,
+                        help='Minimum metres between chosen courts (default: 500)')
+    parser.add_argument('--min-score', type=float, default=0, help='Only consider sites scoring at least this')
+    args = parser.parse_args(argv)
+
+    locations = pd.read_csv(args.input)
+    try:
+        portfolio = build_portfolio(locations, k=args.k, coverage_radius_m=args.coverage_radius,
+                                    min_spacing_m=args.min_spacing, min_score=args.min_score,
+                                    area_households=load_area_households())
+    except ValueError as e:
+        parser.error(f"{args.input}: {e}")
+    print_portfolio(portfolio)
+    portfolio.to_csv(args.output, index=False)
+    print(f"Portfolio of {len(portfolio)} sites saved to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+import requests
+
+DEFAULT_CACHE_PATH = 'onemap_cache.sqlite'
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600  # one week
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # compressed bodies
+
+class ResponseCache:
+    """Content-addressed SQLite store of OneMap responses.
+
+    Entries are keyed by a hash of the endpoint and the query parameters
+    (never the Authorization header, so a new token still hits the cache).
+    Bodies are zlib-compressed, each entry carries its own expiry, and the
+    least recently used entries are evicted once the store grows past
+    max_bytes. In offline mode expired entries are still replayed and a
+    miss never falls through to the network.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES, offline: bool = False):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                content_type TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)')
+        self._conn.commit()
+        # Running total of the stored body sizes, so a put does not have to sum the table
+        self._size_bytes = self._sum_sizes_locked()
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict]) -> str:
+        """Hash the endpoint (full URL, host included) and parameters into a stable cache key"""
+        payload = json.dumps({'url': url, 'params': params or {}}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, url: str, params: Optional[Dict] = None) -> Optional[requests.Response]:
+        """Return the cached response for a request, or None on a miss"""
+        key = self.make_key(url, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status_code, content_type, body, expires_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or (row[3] < now and not self.offline):
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+            self.hits += 1
+
+        status_code, content_type, body, _ = row
+        response = requests.Response()
+        response.status_code = status_code
+        response.url = url
+        response.encoding = 'utf-8'
+        response._content = zlib.decompress(body)
+        if content_type:
+            response.headers['Content-Type'] = content_type
+        response.headers['X-Cache'] = 'HIT'
+        return response
+
+    def put(self, url: str, params: Optional[Dict], response: requests.Response,
+            ttl_seconds: Optional[float] = None):
+        """Store a response, then evict old entries if the cache is over its size limit"""
+        key = self.make_key(url, params)
+        body = zlib.compress(response.content)
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            replaced = self._conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, url, json.dumps(params or {}, sort_keys=True, default=str), response.status_code,
+                 response.headers.get('Content-Type'), body, len(body), now, now + ttl, now)
+            )
+            self.stores += 1
+            self._size_bytes += len(body) - (replaced[0] if replaced else 0)
+            self._evict_locked()
+            self._conn.commit()
+
+    def _sum_sizes_locked(self) -> int:
+        return self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def _evict_locked(self):
+        if self._size_bytes <= self.max_bytes:
+            return
+        # Drop expired entries first, then the least recently used ones
+        self._conn.execute('DELETE FROM responses WHERE expires_at < ?', (time.time(),))
+        total = self._sum_sizes_locked()
+        for key, size in self._conn.execute('SELECT key, size FROM responses ORDER BY last_access').fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            total -= size
+        self._size_bytes = total
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._size_bytes
+
+    def entry_count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._conn.commit()
+            self._size_bytes = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# Cache shared by every robust_request call in the process
+_active_cache: Optional[ResponseCache] = None
+
+def configure_response_cache(path: str = DEFAULT_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                             max_bytes: int = DEFAULT_MAX_BYTES, offline: bool = False) -> ResponseCache:
+    """Open the response cache used by robust_request"""
+    global _active_cache
+    if _active_cache is not None:
+        _active_cache.close()
+    _active_cache = ResponseCache(path, ttl_seconds=ttl_seconds, max_bytes=max_bytes, offline=offline)
+    return _active_cache
+
+def get_response_cache() -> Optional[ResponseCache]:
+    return _active_cache
+
+def disable_response_cache():
+    global _active_cache
+    if _active_cache is not None:
+        _active_cache.close()
+    _active_cache = None
@@ -1,15 +1,215 @@
+import os
 import pandas as pd
 import folium
 from folium import plugins
 
-def create_simple_ultra_map():
-    """Create a simple ultra high-resolution map with existing CSV data"""
-    print("Loading CSV data...")
+from columnar_io import DEFAULT_ARROW_FILE, read_locations_arrow
+from instrumentation import configure_instrumentation, get_instrumentation
+from map_clustering import DEFAULT_CLUSTER_MAX_ZOOM, build_zoom_clusters
+from map_layers import (RENDER_MODES, FilterPanel, add_point_layer, check_render_mode, parse_layer_render_modes,
+                        point_style)
+from map_tiles import add_tiled_point_layer, tile_url
+
+# Shared popup/tooltip templates for the data render mode, filled in the browser
+POPUP_TEMPLATE = """
+<div style="width: 300px;">
+    <h4>{name}</h4>
+    <p><strong>Type:</strong> {type_label}</p>
+    <p><strong>Score:</strong> {suitability_score}/100</p>
+    <p><strong>Area:</strong> {area_estimate_sqm} sqm</p>
+    <p><strong>Surface:</strong> {surface_type}</p>
+    <p><strong>Current Use:</strong> {current_use}</p>
+    <p><strong>Address:</strong> {address}</p>
+    <p><strong>Planning Area:</strong> {planning_area}</p>
+    <p><strong>Land Owner:</strong> {land_owner}</p>
+    <p><strong>Permission Required:</strong> {likely_permission_required_from}</p>
+</div>
+"""
+TOOLTIP_TEMPLATE = '{name} ({type_label})'
+POPUP_FIELDS = ['name', 'type_label', 'suitability_score', 'area_estimate_sqm', 'surface_type', 'current_use',
+                'address', 'planning_area', 'land_owner', 'likely_permission_required_from']
+# Repeated values stored once per layer instead of once per point
+CATEGORY_FIELDS = ['type_label', 'surface_type', 'current_use', 'planning_area', 'land_owner',
+                   'likely_permission_required_from', 'recommendation']
+# Packed as typed arrays for the in-browser filter panel
+FILTER_FIELDS = ['suitability_score', 'type_label', 'recommendation', 'planning_area', 'land_owner']
+RECOMMENDATION_ORDER = ['High', 'Medium', 'Low']
+
+def load_locations(arrow_file=DEFAULT_ARROW_FILE, csv_file='padel_court_locations_CLEAN_HIGHRES.csv'):
+    """Load the location table, preferring the memory-mapped Arrow file over the CSV
+    unless the CSV is newer (edited or regenerated since the Arrow file was written)"""
+    stale = (os.path.exists(arrow_file) and os.path.exists(csv_file)
+             and os.path.getmtime(csv_file) > os.path.getmtime(arrow_file))
+    if stale:
+        print(f"⚠️  {csv_file} is newer than {arrow_file}, loading the CSV")
+    elif os.path.exists(arrow_file):
+        try:
+            table = read_locations_arrow(arrow_file)
+            df = table.to_pandas()
+            print(f"✅ Loaded {len(df)} locations from {arrow_file} (memory-mapped)")
+            return df
+        except ImportError as e:
+            print(f"⚠️  Cannot read {arrow_file} ({e}), falling back to CSV")
     
-    # Load the CSV file
+    df = pd.read_csv(csv_file)
+    print(f"✅ Loaded {len(df)} locations from CSV")
+    return df
+
+def prepare_marker_rows(df_clean, location_colors):
+    """Validate and cast every column the per-point markers use, once for the whole table.
+
+    Rows whose coordinates or score are not numeric are reported and
+    dropped, as the old row-by-row loop did. Text columns the table lacks
+    read 'Unknown'. Adds the display columns type_label and color.
+    """
+    def text(column, default='Unknown'):
+        if column not in df_clean:
+            return pd.Series(default, index=df_clean.index, dtype=object)
+        return df_clean[column].map(str).astype(object)
+
+    lat = pd.to_numeric(df_clean['lat'], errors='coerce')
+    lng = pd.to_numeric(df_clean['lng'], errors='coerce')
+    if 'suitability_score' in df_clean:
+        score = pd.to_numeric(df_clean['suitability_score'], errors='coerce')
+    else:
+        score = pd.Series(0, index=df_clean.index)
+    valid = lat.notna() & lng.notna() & score.notna()
+    instrumentation = get_instrumentation()
+    for index in df_clean.index[~valid]:
+        instrumentation.detail(f"Error adding marker for row {index}: invalid coordinates or score")
+    if not valid.all():
+        print(f"Skipped {int((~valid).sum())} rows with invalid coordinates or score")
+
+    loc_type = text('type', 'unknown')
+    rows = pd.DataFrame({
+        'lat': lat.astype(float),
+        'lng': lng.astype(float),
+        'name': text('name'),
+        'score': score.where(valid, 0).astype(int),
+        'type': loc_type,
+        'type_label': loc_type.str.replace('_', ' ').str.title(),
+        'color': loc_type.map(location_colors).fillna('lightgray'),
+        'area_estimate_sqm': text('area_estimate_sqm'),
+        'surface_type': text('surface_type'),
+        'current_use': text('current_use'),
+        'address': text('address'),
+        'planning_area': text('planning_area'),
+        'land_owner': text('land_owner'),
+        'likely_permission_required_from': text('likely_permission_required_from'),
+    }, index=df_clean.index)
+    return rows[valid]
+
+def add_marker_rows(m, rows, feature_groups):
+    """Add a folium.Marker with inlined popup per prepared row (see
+    prepare_marker_rows) in one itertuples pass; returns the type counts"""
+    for row in rows.itertuples(index=False):
+        popup_html = f"""
+            <div style="width: 300px;">
+                <h4>{row.name}</h4>
+                <p><strong>Type:</strong> {row.type_label}</p>
+                <p><strong>Score:</strong> {row.score}/100</p>
+                <p><strong>Area:</strong> {row.area_estimate_sqm} sqm</p>
+                <p><strong>Surface:</strong> {row.surface_type}</p>
+                <p><strong>Current Use:</strong> {row.current_use}</p>
+                <p><strong>Address:</strong> {row.address}</p>
+                <p><strong>Planning Area:</strong> {row.planning_area}</p>
+                <p><strong>Land Owner:</strong> {row.land_owner}</p>
+                <p><strong>Permission Required:</strong> {row.likely_permission_required_from}</p>
+            </div>
+            """
+        marker = folium.Marker(
+            location=[row.lat, row.lng],
+            popup=folium.Popup(popup_html, max_width=350),
+            tooltip=f"{row.name} ({row.type_label})",
+            icon=folium.Icon(color=row.color, icon='info-sign')
+        )
+        marker.add_to(feature_groups.get(row.type, m))
+    return rows.groupby('type', sort=False).size().to_dict()
+
+def add_filter_panel(m, view):
+    """Add the in-browser filter panel, offering the values present in view"""
+    def values(field):
+        if field not in view:
+            return ['Unknown']
+        return sorted(view[field].fillna('Unknown').astype(str).unique())
+    recommendations = values('recommendation')
+    FilterPanel(
+        score_field='suitability_score',
+        checkboxes=[
+            ('Type', 'type_label', values('type_label')),
+            ('Recommendation', 'recommendation',
+             [r for r in RECOMMENDATION_ORDER if r in recommendations]
+             + [r for r in recommendations if r not in RECOMMENDATION_ORDER]),
+            ('Land owner', 'land_owner', values('land_owner')),
+        ],
+        selects=[('Planning area', 'planning_area', values('planning_area'))],
+    ).add_to(m)
+
+def add_data_layers(m, df_clean, feature_groups, location_colors, layer_modes, cluster_max_zoom=None,
+                    tile_dir=None, output_file=None):
+    """Add one data-driven point layer per location type, drawn as layer_modes[type]
+    ('data' or 'canvas'), with precomputed clusters up to cluster_max_zoom if
+    given. With tile_dir the points are written to per-type tile files there
+    instead of into the page. Score, type, recommendation, planning area and
+    owner are packed as typed arrays for the filter panel. Returns the type
+    counts"""
+    types = df_clean.get('type', pd.Series('unknown', index=df_clean.index)).fillna('unknown').astype(str)
+    scores = df_clean.get('suitability_score', pd.Series(0, index=df_clean.index))
+    view = df_clean.assign(
+        type=types,
+        type_label=types.str.replace('_', ' ').str.title(),
+        suitability_score=pd.to_numeric(scores, errors='coerce').fillna(0).astype(int),
+    )
+    type_counts = {}
+    add_filter_panel(m, view)
+    for loc_type, group in view.groupby('type', sort=False):
+        type_counts[loc_type] = len(group)
+        clusters = None
+        if cluster_max_zoom is not None:
+            clusters = build_zoom_clusters(group['lat'].to_numpy(), group['lng'].to_numpy(),
+                                           group['suitability_score'].to_numpy(), max_zoom=cluster_max_zoom)
+        layer_options = dict(
+            popup=POPUP_TEMPLATE, tooltip=TOOLTIP_TEMPLATE, popup_max_width=350,
+            styles={'default': point_style(location_colors.get(loc_type, 'lightgray'))},
+            render=layer_modes[loc_type], clusters=clusters, score_field='suitability_score',
+            typed_fields=FILTER_FIELDS,
+        )
+        parent = feature_groups.get(loc_type, m)
+        if tile_dir is not None:
+            add_tiled_point_layer(parent, group, POPUP_FIELDS, CATEGORY_FIELDS,
+                                  directory=os.path.join(tile_dir, loc_type),
+                                  url=tile_url(tile_dir, output_file, loc_type), **layer_options)
+        else:
+            add_point_layer(parent, group, POPUP_FIELDS, CATEGORY_FIELDS, **layer_options)
+    return type_counts
+
+def create_simple_ultra_map(render_mode='markers', output_file='SIMPLE_ULTRA_MAP_BY_TYPE.html',
+                            layer_render_modes=None, cluster_max_zoom=None, tile_dir=None):
+    """Create a simple ultra high-resolution map with existing location data.
+
+    render_mode 'markers' writes a marker with inlined popup HTML per
+    point; 'data' puts all points in one payload with shared templates,
+    which keeps the HTML small; 'canvas' draws that payload as circles on
+    a canvas, which stays fast with 100k+ points (see map_layers).
+    layer_render_modes overrides the mode per location type, e.g.
+    {'hdb_block': 'canvas'}. With cluster_max_zoom, the data and canvas
+    layers show grid clusters (count and average score) computed here
+    for every zoom up to that level, and the points only beyond it.
+    With tile_dir, those layers' points are written there as per-tile
+    JSON (+ .gz) files that the page fetches for the area in view, so the
+    HTML is only a shell; the page must then be served over HTTP.
+    """
+    check_render_mode(render_mode)
+    layer_render_modes = layer_render_modes or {}
+    for mode in layer_render_modes.values():
+        check_render_mode(mode)
+    instrumentation = get_instrumentation()
+    print("Loading location data...")
+    
+    # Load the Arrow file, or the CSV when there is none
     try:
-        df = pd.read_csv('padel_court_locations_CLEAN_HIGHRES.csv')
-        print(f"✅ Loaded {len(df)} locations from CSV")
+        with instrumentation.stage('load'):
+            df = load_locations()
     except FileNotFoundError:
         print("❌ CSV file not found. Please ensure the file exists.")
         return
@@ -75,58 +275,24 @@ def create_simple_ultra_map():
     markers_added = 0
     type_counts = {}
     
-    for index, row in df_clean.iterrows():
-        try:
-            # Convert to dictionary to avoid pandas type issues
-            row_dict = row.to_dict()
-            
-            lat = float(row_dict['lat'])
-            lng = float(row_dict['lng'])
-            name = str(row_dict.get('name', 'Unknown'))
-            score = int(row_dict.get('suitability_score', 0))
-            loc_type = str(row_dict.get('type', 'unknown'))
-            
-            # Count location types
-            type_counts[loc_type] = type_counts.get(loc_type, 0) + 1
-            
-            # Determine marker color based on location type
-            color = location_colors.get(loc_type, 'lightgray')
-            
-            # Create popup content
-            popup_html = f"""
-            <div style="width: 300px;">
-                <h4>{name}</h4>
-                <p><strong>Type:</strong> {loc_type.replace('_', ' ').title()}</p>
-                <p><strong>Score:</strong> {score}/100</p>
-                <p><strong>Area:</strong> {row_dict.get('area_estimate_sqm', 'Unknown')} sqm</p>
-                <p><strong>Surface:</strong> {row_dict.get('surface_type', 'Unknown')}</p>
-                <p><strong>Current Use:</strong> {row_dict.get('current_use', 'Unknown')}</p>
-                <p><strong>Address:</strong> {row_dict.get('address', 'Unknown')}</p>
-                <p><strong>Planning Area:</strong> {row_dict.get('planning_area', 'Unknown')}</p>
-                <p><strong>Land Owner:</strong> {row_dict.get('land_owner', 'Unknown')}</p>
-                <p><strong>Permission Required:</strong> {row_dict.get('likely_permission_required_from', 'Unknown')}</p>
-            </div>
-            """
-            
-            # Create marker
-            marker = folium.Marker(
-                location=[lat, lng],
-                popup=folium.Popup(popup_html, max_width=350),
-                tooltip=f"{name} ({loc_type.replace('_', ' ').title()})",
-                icon=folium.Icon(color=color, icon='info-sign')
-            )
-            
-            # Add to appropriate feature group
-            if loc_type in feature_groups:
-                marker.add_to(feature_groups[loc_type])
-            else:
-                marker.add_to(m)
-            
-            markers_added += 1
-            
-        except Exception as e:
-            print(f"Error adding marker for row {index}: {e}")
-            continue
+    types = df_clean.get('type', pd.Series('unknown', index=df_clean.index)).fillna('unknown').astype(str)
+    layer_modes = {loc_type: layer_render_modes.get(loc_type, render_mode) for loc_type in types.unique()}
+    is_marker_row = types.map(layer_modes) == 'markers'
+    if not is_marker_row.all():
+        with instrumentation.stage('data_layers'):
+            type_counts = add_data_layers(m, df_clean[~is_marker_row], feature_groups, location_colors, layer_modes,
+                                          cluster_max_zoom, tile_dir, output_file)
+        markers_added = int((~is_marker_row).sum())
+    if is_marker_row.any():
+        with instrumentation.stage('markers'):
+            marker_rows = prepare_marker_rows(df_clean[is_marker_row], location_colors)
+            for loc_type, count in add_marker_rows(m, marker_rows, feature_groups).items():
+                type_counts[loc_type] = type_counts.get(loc_type, 0) + count
+        markers_added += len(marker_rows)
+    
+    areas = df_clean.get('planning_area', pd.Series('unknown', index=df_clean.index)).fillna('unknown').astype(str)
+    for (loc_type, area), count in pd.DataFrame({'type': types, 'area': areas}).value_counts(sort=False).items():
+        instrumentation.count('map_points', int(count), type=loc_type, planning_area=area)
     
     # Add all feature groups to map
     for feature_group in feature_groups.values():
@@ -170,8 +336,11 @@ def create_simple_ultra_map():
             ).add_to(m)
     
     # Save the map
-    output_file = 'SIMPLE_ULTRA_MAP_BY_TYPE.html'
-    m.save(output_file)
+    with instrumentation.stage('save'):
+        m.save(output_file)
+    instrumentation.record_file(output_file)
+    if tile_dir is not None:
+        instrumentation.record_file(tile_dir)
     
     print(f"✅ Map created successfully!")
     print(f"📊 Added {markers_added} markers")
@@ -191,4 +360,40 @@ def create_simple_ultra_map():
     return m
 
 if __name__ == "__main__":
-    create_simple_ultra_map() 
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description='Create the location map by type')
+    parser.add_argument('--render', choices=RENDER_MODES, default='markers',
+                        help="'data' renders every point from one compact payload (much smaller HTML); "
+                             "'canvas' draws that payload as circles on a canvas for very large layers")
+    parser.add_argument('--layer-render', action='append', metavar='TYPE=MODE',
+                        help='Render mode for one location type, e.g. hdb_block=canvas (repeatable)')
+    parser.add_argument('--cluster', nargs='?', type=int, const=DEFAULT_CLUSTER_MAX_ZOOM, metavar='MAX_ZOOM',
+                        help='Show precomputed clusters up to MAX_ZOOM (default %(const)s) in data/canvas layers')
+    parser.add_argument('--tiles', action='store_true',
+                        help='Write data/canvas layer points to <output>_tiles/ and load them per viewport')
+    parser.add_argument('--output', default='SIMPLE_ULTRA_MAP_BY_TYPE.html', help='Output HTML file')
+    parser.add_argument('--quiet', action='store_true', help='Skip the per-row messages')
+    parser.add_argument('--metrics', default=None, metavar='PATH',
+                        help='Write stage timings, point counts and output sizes to PATH '
+                             '(Prometheus text for .prom/.txt, JSON otherwise)')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Record each stage's peak Python memory with tracemalloc")
+    args = parser.parse_args()
+    if args.cluster is not None and args.render == 'markers':
+        parser.error('--cluster needs --render data or --render canvas')
+    if args.tiles and args.render == 'markers':
+        parser.error('--tiles needs --render data or --render canvas')
+    try:
+        layer_render_modes = parse_layer_render_modes(args.layer_render)
+    except ValueError as e:
+        parser.error(str(e))
+    instrumentation = configure_instrumentation(pipeline='simple_ultra_map', quiet=args.quiet,
+                                                trace_memory=args.trace_memory)
+    create_simple_ultra_map(render_mode=args.render, output_file=args.output, layer_render_modes=layer_render_modes,
+                            cluster_max_zoom=args.cluster,
+                            tile_dir=os.path.splitext(args.output)[0] + '_tiles' if args.tiles else None)
+    print("\n=== STAGE TIMINGS ===")
+    instrumentation.print_stages()
+    if args.metrics:
+        instrumentation.write(args.metrics)
+    instrumentation.close()
@@ -0,0 +1,199 @@
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+from catchment import SCORING_RADIUS_M
+from padel_court_finder_clean_highres import (
+    CATCHMENT_SOME_HOUSEHOLDS, CATCHMENT_STRONG_HOUSEHOLDS, PADEL_COURT_MIN_AREA, catchment_assessment,
+)
+
+# Surface categories
+SURFACE_OTHER = 0
+SURFACE_SUITABLE = 1  # concrete or asphalt
+SURFACE_GRASS = 2
+
+# Reason code bits; a cleared bit means the criterion's "not met" reason applies
+REASON_SUFFICIENT_AREA = 1
+REASON_SUITABLE_SURFACE = 2
+REASON_GRASS_SURFACE = 4
+REASON_GOOD_ACCESSIBILITY = 8
+REASON_NEAR_RESIDENTIAL = 16
+REASON_UNDERUTILIZED = 32
+REASON_STRONG_CATCHMENT = 64
+REASON_SOME_CATCHMENT = 128
+
+NEAR_RESIDENTIAL_M = 300
+RECOMMENDATIONS = ['Low', 'Medium', 'High']
+
+def _text_column(df: pd.DataFrame, column: str, default: str) -> pd.Series:
+    if column not in df:
+        return pd.Series(default, index=df.index, dtype=object)
+    return df[column].fillna(default).astype(str)
+
+def _map_unique(values: pd.Series, func: Callable, dtype) -> np.ndarray:
+    """Apply func once per distinct value and broadcast the results back"""
+    codes, uniques = pd.factorize(values, sort=False)
+    mapped = np.array([func(value) for value in uniques], dtype=dtype)
+    return mapped[codes]
+
+def surface_category(surface_type: str) -> int:
+    surface_type = surface_type.lower()
+    if 'concrete' in surface_type or 'asphalt' in surface_type:
+        return SURFACE_SUITABLE
+    if 'grass' in surface_type:
+        return SURFACE_GRASS
+    return SURFACE_OTHER
+
+def is_public_access(accessibility: str) -> bool:
+    return 'public' in accessibility.lower()
+
+def is_underutilized(current_use: str) -> bool:
+    current_use = current_use.lower()
+    return 'underutilized' in current_use or 'parking' in current_use or 'after-hours' in current_use
+
+def parse_residential_distance(residential_proximity: str) -> float:
+    """Distance in metres from an 'HDB within 123m' string, NaN if it has none"""
+    if 'HDB' in residential_proximity and 'within' in residential_proximity:
+        try:
+            return float(residential_proximity.split('within')[1].strip().replace('m', ''))
+        except ValueError:
+            return np.nan
+    return np.nan
+
+def prepare_scoring_columns(locations: pd.DataFrame) -> pd.DataFrame:
+    """Turn location records into the typed columns score_sites_batch works on.
+
+    Strings are classified once per distinct value, so the cost is one
+    factorize per column rather than string tests on every row. The
+    distance comes from the residential_proximity text when present (the
+    same value assess_site_suitability parses) and otherwise from a numeric
+    residential_distance_m column, rounded to whole metres as displayed.
+    catchment_households is the households_<SCORING_RADIUS_M>m column
+    (NaN when unknown), which takes over from the distance when present.
+    """
+    if 'area_estimate_sqm' in locations:
+        area = pd.to_numeric(locations['area_estimate_sqm'], errors='coerce').fillna(0).to_numpy(np.float64)
+    else:
+        area = np.zeros(len(locations))
+
+    if 'residential_proximity' in locations:
+        distance = _map_unique(_text_column(locations, 'residential_proximity', ''),
+                               parse_residential_distance, np.float64)
+    elif 'residential_distance_m' in locations:
+        distance = np.round(pd.to_numeric(locations['residential_distance_m'], errors='coerce').to_numpy(np.float64))
+    else:
+        distance = np.full(len(locations), np.nan)
+
+    households_column = f'households_{SCORING_RADIUS_M}m'
+    if households_column in locations:
+        households = pd.to_numeric(locations[households_column], errors='coerce').to_numpy(np.float64)
+    else:
+        households = np.full(len(locations), np.nan)
+
+    return pd.DataFrame({
+        'area_sqm': area,
+        'surface_category': _map_unique(_text_column(locations, 'surface_type', ''), surface_category, np.int8),
+        'public_access': _map_unique(_text_column(locations, 'accessibility', 'public access'), is_public_access, bool),
+        'residential_distance_m': distance,
+        'catchment_households': households,
+        'underutilized': _map_unique(_text_column(locations, 'current_use', ''), is_underutilized, bool),
+    }, index=locations.index)
+
+def score_sites_batch(columns: pd.DataFrame) -> pd.DataFrame:
+    """Vectorized assess_site_suitability over typed columns.
+
+    Expects area_sqm, surface_category, public_access,
+    residential_distance_m (NaN when unknown), catchment_households
+    (optional, NaN when unknown) and underutilized, as built by
+    prepare_scoring_columns. Returns suitability_score, recommendation
+    and a reason_codes bitmask (see the REASON_* constants).
+    """
+    area_ok = columns['area_sqm'].to_numpy() >= PADEL_COURT_MIN_AREA
+    surface = columns['surface_category'].to_numpy()
+    public = columns['public_access'].to_numpy(dtype=bool)
+    if 'catchment_households' in columns:
+        households = columns['catchment_households'].to_numpy(np.float64)
+    else:
+        households = np.full(len(columns), np.nan)
+    has_catchment = np.isfinite(households)
+    with np.errstate(invalid='ignore'):
+        near = ~has_catchment & (columns['residential_distance_m'].to_numpy(np.float64) <= NEAR_RESIDENTIAL_M)
+        strong = has_catchment & (households >= CATCHMENT_STRONG_HOUSEHOLDS)
+        some = has_catchment & ~strong & (households >= CATCHMENT_SOME_HOUSEHOLDS)
+    underutilized = columns['underutilized'].to_numpy(dtype=bool)
+
+    score = (30 * area_ok
+             + np.where(surface == SURFACE_SUITABLE, 25, np.where(surface == SURFACE_GRASS, 15, 0))
+             + 20 * public
+             + 15 * near + 15 * strong + 8 * some
+             + 10 * underutilized).astype(np.int16)
+    reason_codes = (REASON_SUFFICIENT_AREA * area_ok
+                    + REASON_SUITABLE_SURFACE * (surface == SURFACE_SUITABLE)
+                    + REASON_GRASS_SURFACE * (surface == SURFACE_GRASS)
+                    + REASON_GOOD_ACCESSIBILITY * public
+                    + REASON_NEAR_RESIDENTIAL * near
+                    + REASON_UNDERUTILIZED * underutilized
+                    + REASON_STRONG_CATCHMENT * strong
+                    + REASON_SOME_CATCHMENT * some).astype(np.uint8)
+    recommendation = (score >= 50).astype(np.int8) + (score >= 70)
+
+    return pd.DataFrame({
+        'suitability_score': score,
+        'recommendation': pd.Categorical.from_codes(recommendation, categories=RECOMMENDATIONS),
+        'reason_codes': reason_codes,
+    }, index=columns.index)
+
+def _reason_column(met: np.ndarray, met_text: str, values: pd.Series, unmet_format: Callable) -> np.ndarray:
+    """Per-row reason text: met_text where the criterion holds, otherwise
+    unmet_format(value), formatted once per distinct value"""
+    unmet = _map_unique(values, unmet_format, object)
+    return np.where(met, met_text, unmet)
+
+def reasons_from_codes(locations: pd.DataFrame, reason_codes: np.ndarray) -> List[List[str]]:
+    """Rebuild the human-readable reasons lists assess_site_suitability produces"""
+    reason_codes = np.asarray(reason_codes)
+    area = (pd.to_numeric(locations['area_estimate_sqm'], errors='coerce').fillna(0)
+            if 'area_estimate_sqm' in locations else pd.Series(0.0, index=locations.index))
+    if 'residential_proximity' in locations:
+        proximity = _text_column(locations, 'residential_proximity', '')
+    else:
+        from padel_court_finder_clean_highres import format_residential_proximity
+        distances = pd.to_numeric(locations['residential_distance_m'], errors='coerce')
+        proximity = pd.Series(_map_unique(distances, format_residential_proximity, object), index=locations.index)
+
+    area_reason = np.where(reason_codes & REASON_SUFFICIENT_AREA,
+                           _map_unique(area, lambda value: f"Sufficient area ({value:.0f} sqm)", object),
+                           _map_unique(area, lambda value: f"Insufficient area ({value:.0f} sqm)", object))
+    surface_reason = np.where(reason_codes & REASON_GRASS_SURFACE, 'Grass surface (may need modification)',
+                              _reason_column(reason_codes & REASON_SUITABLE_SURFACE, 'Suitable surface type',
+                                             _text_column(locations, 'surface_type', ''),
+                                             lambda value: f"Surface type: {value.lower()}"))
+    access_reason = _reason_column(reason_codes & REASON_GOOD_ACCESSIBILITY, 'Good accessibility',
+                                   _text_column(locations, 'accessibility', 'public access'),
+                                   lambda value: f"Accessibility: {value}")
+    residential_reason = _reason_column(reason_codes & REASON_NEAR_RESIDENTIAL, 'Near residential areas',
+                                        proximity, lambda value: f"Residential proximity: {value}")
+    households_column = f'households_{SCORING_RADIUS_M}m'
+    if households_column in locations:
+        households = pd.to_numeric(locations[households_column], errors='coerce')
+        known = households.notna().to_numpy()
+        if known.any():
+            catchment_reason = _map_unique(households[known], lambda value: catchment_assessment(value)[1], object)
+            residential_reason = residential_reason.astype(object)
+            residential_reason[known] = catchment_reason
+    use_reason = _reason_column(reason_codes & REASON_UNDERUTILIZED, 'Underutilized space',
+                                _text_column(locations, 'current_use', ''),
+                                lambda value: f"Current use: {value.lower()}")
+    return [list(reasons) for reasons in zip(area_reason, surface_reason, access_reason,
+                                             residential_reason, use_reason)]
+
+def score_locations_batch(locations, with_reasons: bool = True) -> pd.DataFrame:
+    """Score a table of locations in one pass; the batch counterpart of
+    calling assess_site_suitability on every record"""
+    if not isinstance(locations, pd.DataFrame):
+        locations = pd.DataFrame(locations)
+    result = score_sites_batch(prepare_scoring_columns(locations))
+    if with_reasons:
+        result['reasons'] = reasons_from_codes(locations, result['reason_codes'].to_numpy())
+    return result
@@ -0,0 +1,244 @@
+import json
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BOUNDARIES_FILE = 'planning_areas_boundaries.geojson'
+AREA_NAME_PROPERTY = 'PLN_AREA_N'  # URA planning-area name, upper case
+NODE_CAPACITY = 8  # bounding boxes per STR tree node
+EDGES_PER_BAND = 4  # target polygon edges per horizontal band
+MAX_BANDS = 4096  # per polygon
+POINT_CHUNK = 200_000  # points tested together, bounds the pair arrays
+
+def load_boundaries(path: str = DEFAULT_BOUNDARIES_FILE) -> Optional[Dict]:
+    """Planning-area GeoJSON, or None (with a warning) if the file is missing"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print(f"Warning: {path} not found")
+        return None
+
+def geometry_polygons(geometry: Optional[Dict]) -> List[List]:
+    """Polygons (each a list of rings) of a Polygon or MultiPolygon geometry"""
+    if not geometry:
+        return []
+    if geometry.get('type') == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry.get('type') == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+def _expand(starts: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Group number and position for every member of the slices starts[i]:starts[i] + counts[i]"""
+    total = int(counts.sum())
+    group = np.repeat(np.arange(len(counts)), counts)
+    within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return group, np.repeat(starts, counts) + within
+
+class STRTree:
+    """Sort-Tile-Recursive packed R-tree over bounding boxes.
+
+    Boxes are sorted into vertical slices by centre x, each slice is sorted
+    by centre y and cut into nodes of node_capacity boxes, and the node
+    boxes are packed the same way until one root is left. Queries walk the
+    tree level by level for a whole batch of points at once.
+    """
+
+    def __init__(self, boxes: np.ndarray, node_capacity: int = NODE_CAPACITY):
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)  # minx, miny, maxx, maxy
+        self.capacity = node_capacity
+        # levels[0] is the root; each level holds its node boxes and child slices
+        self.levels = []
+        order = self._pack(np.arange(len(self.boxes)), self.boxes)
+        self.order = order  # box ids in leaf order
+        child_boxes = self.boxes[order]
+        while True:
+            starts = np.arange(0, len(child_boxes), self.capacity)
+            counts = np.minimum(self.capacity, len(child_boxes) - starts)
+            node_boxes = np.array([
+                [child_boxes[s:s + c, 0].min(), child_boxes[s:s + c, 1].min(),
+                 child_boxes[s:s + c, 2].max(), child_boxes[s:s + c, 3].max()]
+                for s, c in zip(starts, counts)
+            ]).reshape(-1, 4)
+            if len(node_boxes) <= 1:
+                self.levels.insert(0, (node_boxes, starts, counts))
+                break
+            node_order = self._pack(np.arange(len(node_boxes)), node_boxes)
+            # Reorder this level's nodes (and so their child slices) into packed order
+            self.levels.insert(0, (node_boxes[node_order], starts[node_order], counts[node_order]))
+            child_boxes = node_boxes[node_order]
+
+    def _pack(self, ids: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+        if len(ids) <= self.capacity:
+            return ids
+        cx = (boxes[:, 0] + boxes[:, 2]) / 2
+        cy = (boxes[:, 1] + boxes[:, 3]) / 2
+        n_nodes = math.ceil(len(ids) / self.capacity)
+        per_slice = math.ceil(len(ids) / math.ceil(math.sqrt(n_nodes)))
+        per_slice = math.ceil(per_slice / self.capacity) * self.capacity
+        by_x = np.argsort(cx, kind='stable')
+        parts = [s[np.argsort(cy[s], kind='stable')] for s in np.array_split(by_x, range(per_slice, len(ids), per_slice))]
+        return ids[np.concatenate(parts)]
+
+    @staticmethod
+    def _contains(boxes: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        return (boxes[:, 0] <= x) & (x <= boxes[:, 2]) & (boxes[:, 1] <= y) & (y <= boxes[:, 3])
+
+    def query_points(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        """All (point index, box index) pairs where the box contains the point"""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        if len(self.boxes) == 0 or len(x) == 0:
+            return empty
+        root_boxes, _, _ = self.levels[0]
+        q = np.flatnonzero(self._contains(np.repeat(root_boxes, len(x), axis=0), x, y))
+        node = np.zeros(len(q), dtype=np.int64)
+        for depth, (_, starts, counts) in enumerate(self.levels):
+            group, child = _expand(starts[node], counts[node])
+            q = q[group]
+            if depth + 1 < len(self.levels):
+                child_boxes = self.levels[depth + 1][0][child]
+            else:
+                child = self.order[child]
+                child_boxes = self.boxes[child]
+            keep = self._contains(child_boxes, x[q], y[q])
+            q, node = q[keep], child[keep]
+            if len(q) == 0:
+                return empty
+        return q, node
+
+class PolygonIndex:
+    """Point-in-polygon lookups for many points against a GeoJSON FeatureCollection.
+
+    An STR tree over the feature bounding boxes narrows each point down to
+    the few features whose box contains it. Each feature's edges are
+    bucketed into horizontal bands, so the ray-crossing test for a point
+    only looks at the handful of edges in its own band. Holes and
+    MultiPolygon parts fall out of the even-odd crossing rule. Coordinates
+    are GeoJSON (lng, lat) degrees.
+    """
+
+    def __init__(self, geojson: Dict, name_property: str = AREA_NAME_PROPERTY):
+        features = (geojson or {}).get('features', [])
+        self.names = np.array([(feature.get('properties') or {}).get(name_property) for feature in features],
+                              dtype=object)
+
+        edges, owners, boxes = [], [], []
+        for feature_id, feature in enumerate(features):
+            rings = [np.asarray(ring, dtype=np.float64)[:, :2]
+                     for polygon in geometry_polygons(feature.get('geometry')) for ring in polygon if len(ring) >= 3]
+            if not rings:
+                boxes.append([np.inf, np.inf, -np.inf, -np.inf])  # matches nothing
+                continue
+            points = np.concatenate(rings)
+            boxes.append([points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max()])
+            for ring in rings:
+                closed = ring if np.array_equal(ring[0], ring[-1]) else np.vstack([ring, ring[:1]])
+                ring_edges = np.hstack([closed[:-1], closed[1:]])  # x1, y1, x2, y2
+                ring_edges = ring_edges[ring_edges[:, 1] != ring_edges[:, 3]]  # horizontal edges never cross
+                edges.append(ring_edges)
+                owners.append(np.full(len(ring_edges), feature_id))
+        self.boxes = np.array(boxes, dtype=np.float64).reshape(-1, 4)
+        self.edges = np.concatenate(edges) if edges else np.empty((0, 4))
+        edge_owner = np.concatenate(owners) if owners else np.empty(0, dtype=np.int64)
+        self.tree = STRTree(self.boxes)
+        self._build_bands(edge_owner)
+
+    def _build_bands(self, edge_owner: np.ndarray):
+        n = len(self.boxes)
+        edge_counts = np.bincount(edge_owner, minlength=n)
+        self.band_count = np.clip(edge_counts // EDGES_PER_BAND, 1, MAX_BANDS)
+        self.band_offset = np.cumsum(self.band_count) - self.band_count
+        height = self.boxes[:, 3] - self.boxes[:, 1]
+        self.band_height = np.where(np.isfinite(height) & (height > 0), height / self.band_count, 1.0)
+
+        y_low = np.minimum(self.edges[:, 1], self.edges[:, 3])
+        y_high = np.maximum(self.edges[:, 1], self.edges[:, 3])
+        first = self._band(edge_owner, y_low)
+        last = self._band(edge_owner, y_high)
+        # An edge goes into every band it spans
+        group, band = _expand(first, last - first + 1)
+        keys = self.band_offset[edge_owner[group]] + band
+        order = np.argsort(keys, kind='stable')
+        self.band_edges = group[order]
+        self.band_starts = np.searchsorted(keys[order], np.arange(int(self.band_count.sum()) + 1))
+
+    def _band(self, feature: np.ndarray, y: np.ndarray) -> np.ndarray:
+        band = np.floor((y - self.boxes[feature, 1]) / self.band_height[feature])
+        return np.clip(band, 0, self.band_count[feature] - 1).astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def locate(self, lat, lng) -> np.ndarray:
+        """Index of the feature containing each point, -1 where none does"""
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        found = np.full(len(lat), -1, dtype=np.int64)
+        for start in range(0, len(lat), POINT_CHUNK):
+            x, y = lng[start:start + POINT_CHUNK], lat[start:start + POINT_CHUNK]
+            point, feature = self.tree.query_points(x, y)
+            if len(point) == 0:
+                continue
+            keys = self.band_offset[feature] + self._band(feature, y[point])
+            pair, slot = _expand(self.band_starts[keys], self.band_starts[keys + 1] - self.band_starts[keys])
+            edge = self.edges[self.band_edges[slot]]
+            px, py = x[point[pair]], y[point[pair]]
+            x1, y1, x2, y2 = edge[:, 0], edge[:, 1], edge[:, 2], edge[:, 3]
+            spans = (y1 > py) != (y2 > py)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                crosses = spans & (px < x1 + (py - y1) * (x2 - x1) / (y2 - y1))
+            inside = np.bincount(pair[crosses], minlength=len(point)) % 2 == 1
+            # Areas do not overlap; if they ever do, the first feature wins
+            first = np.full(len(x), len(self.names))
+            np.minimum.at(first, point[inside], feature[inside])
+            found[start:start + len(x)] = np.where(first < len(self.names), first, -1)
+        return found
+
+    def area_names(self, lat, lng) -> np.ndarray:
+        """Name of the area containing each point, None where no area does"""
+        return self._names_of(self.locate(lat, lng))
+
+    def _names_of(self, feature: np.ndarray) -> np.ndarray:
+        names = np.full(len(feature), None, dtype=object)
+        inside = feature >= 0
+        names[inside] = self.names[feature[inside]]
+        return names
+
+    def join(self, lat, lng) -> Tuple[np.ndarray, pd.Series]:
+        """Area name per point plus the number of points in every area, from one pass"""
+        feature = self.locate(lat, lng)
+        counts = np.bincount(feature[feature >= 0], minlength=len(self.names))
+        per_area = pd.Series(counts, index=pd.Index(self.names, name='planning_area'), name='points')
+        return self._names_of(feature), per_area.groupby(level=0, sort=True).sum()
+
+def load_planning_area_index(path: str = DEFAULT_BOUNDARIES_FILE) -> Optional[PolygonIndex]:
+    """PolygonIndex over the planning-area boundaries, or None if the file is missing"""
+    boundaries = load_boundaries(path)
+    if boundaries is None:
+        return None
+    return PolygonIndex(boundaries)
+
+def match_area_names(names, known_names) -> np.ndarray:
+    """Spell area names the way known_names does (e.g. 'ANG MO KIO' -> 'Ang Mo Kio');
+    names not in known_names are title-cased, None stays None"""
+    spelling = {str(name).upper(): name for name in known_names}
+    return np.array([None if name is None else spelling.get(str(name).upper(), str(name).title())
+                     for name in names], dtype=object)
+
+def area_density(counts: pd.Series, income_data: pd.DataFrame, per_households: int = 1000) -> pd.DataFrame:
+    """Points per area against the area's total_households.
+
+    counts comes from PolygonIndex.join(); area names are matched to the
+    income data's planning_area column ignoring case. Areas without
+    household data get NaN density.
+    """
+    households = income_data.set_index(income_data['planning_area'].str.upper())['total_households']
+    table = pd.DataFrame({'points': counts})
+    table['total_households'] = households.reindex(table.index.astype(str).str.upper()).to_numpy()
+    table[f'per_{per_households}_households'] = table['points'] / table['total_households'] * per_households
+    return table
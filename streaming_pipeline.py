@@ -0,0 +1,101 @@
+import csv
+import queue
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from padel_court_finder_clean_highres import enrich_area_locations, search_area_categories
+
+DEFAULT_STREAM_CSV = 'padel_court_locations_STREAM.csv'
+DEFAULT_QUEUE_SIZE = 4  # areas buffered between stages
+
+# Columns known as soon as an area is enriched
+STREAM_FIELDS = [
+    'name', 'address', 'lat', 'lng', 'type', 'planning_area', 'area_estimate_sqm', 'surface_type',
+    'current_use', 'land_owner', 'likely_permission_required_from', 'accessibility',
+    'residential_proximity', 'ura_space_link', 'onemap_link', 'suitability_score', 'reasons',
+    'recommendation',
+]
+
+_DONE = object()
+
+def _crawl_stage(areas: List[str], out_queue: queue.Queue, max_pages: Optional[int], area_delay: float):
+    """Fetch each area's raw category results and hand them downstream"""
+    try:
+        for area in areas:
+            try:
+                results_by_type, failed_categories = search_area_categories(area, max_pages)
+                out_queue.put((area, results_by_type, failed_categories))
+                time.sleep(area_delay)  # Be respectful to the API
+            except Exception as e:
+                print(f"Error searching {area}: {e}")
+    finally:
+        out_queue.put(_DONE)
+
+def _enrich_stage(in_queue: queue.Queue, out_queue: queue.Queue, on_area_complete):
+    """Enrich and score each area as soon as its raw results arrive"""
+    try:
+        while True:
+            item = in_queue.get()
+            if item is _DONE:
+                break
+            area, results_by_type, failed_categories = item
+            try:
+                locations = enrich_area_locations(area, results_by_type)
+                if on_area_complete is not None:
+                    on_area_complete(area, locations, failed_categories)
+                out_queue.put(locations)
+            except Exception as e:
+                print(f"Error searching {area}: {e}")
+    finally:
+        out_queue.put(_DONE)
+
+def stream_area_locations(areas: List[str], max_pages: Optional[int] = None, on_area_complete=None,
+                          queue_size: int = DEFAULT_QUEUE_SIZE, area_delay: float = 1.0) -> Iterator[List[Dict]]:
+    """Yield each area's enriched, scored locations while later areas are still being fetched.
+
+    The crawl and enrichment stages run on their own threads connected by
+    bounded queues, so a slow consumer applies back-pressure instead of
+    letting raw results pile up in memory.
+    """
+    raw_queue = queue.Queue(maxsize=queue_size)
+    enriched_queue = queue.Queue(maxsize=queue_size)
+    stages = [
+        threading.Thread(target=_crawl_stage, args=(areas, raw_queue, max_pages, area_delay),
+                         name='crawl', daemon=True),
+        threading.Thread(target=_enrich_stage, args=(raw_queue, enriched_queue, on_area_complete),
+                         name='enrich', daemon=True),
+    ]
+    for stage in stages:
+        stage.start()
+    while True:
+        locations = enriched_queue.get()
+        if locations is _DONE:
+            break
+        yield locations
+    for stage in stages:
+        stage.join()
+
+def run_streaming_crawl(areas: List[str], stream_csv: str = DEFAULT_STREAM_CSV, max_pages: Optional[int] = None,
+                        on_area_complete=None, queue_size: int = DEFAULT_QUEUE_SIZE,
+                        area_delay: float = 1.0) -> List[Dict]:
+    """Crawl, enrich and score the areas as overlapping stages, appending every
+    scored location to stream_csv as it arrives.
+
+    The stream file is provisional: it is not deduplicated or sorted, and
+    residential proximity is still the per-area value. Returns all
+    locations for the global steps (dedup, sort, map).
+    """
+    all_locations = []
+    start = time.perf_counter()
+    with open(stream_csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=STREAM_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for locations in stream_area_locations(areas, max_pages, on_area_complete, queue_size, area_delay):
+            writer.writerows(locations)
+            f.flush()
+            if not all_locations and locations:
+                print(f"First rows written to {stream_csv} after {time.perf_counter() - start:.1f}s")
+            all_locations.extend(locations)
+    print(f"Streamed {len(all_locations)} scored locations to {stream_csv}")
+    return all_locations